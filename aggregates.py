@@ -0,0 +1,122 @@
+import math
+import pandas as pd
+
+
+def _month_key(date):
+    return '' if pd.isna(date) else f"{date.year:04d}-{date.month:02d}"
+
+
+def _sign(amount):
+    return 1 if amount > 0 else (-1 if amount < 0 else 0)
+
+
+class AggregateEngine:
+    """Materialized sums, counts and sums of squares per (month, category, sign)
+
+    Built once from the history with a vectorized groupby, then kept current
+    in O(1) per added or re-categorized row. Dashboard totals, category
+    breakdowns and per-category statistics are all read from these cells.
+    """
+
+    def __init__(self):
+        self.cells = {}
+
+    def build(self, df):
+        self.cells = {}
+        if df.empty:
+            return
+        amounts = pd.to_numeric(df['amount'], errors='coerce')
+        dates = pd.to_datetime(df['date'], errors='coerce')
+        frame = pd.DataFrame({
+            'month': dates.dt.strftime('%Y-%m').fillna(''),
+            'category': df['category'].where(df['category'].notna(), None),
+            'sign': amounts.gt(0).astype(int) - amounts.lt(0).astype(int),
+            'amount': amounts,
+            'amount_sq': amounts ** 2
+        }).dropna(subset=['amount'])
+        grouped = frame.groupby(['month', 'category', 'sign'], dropna=False).agg(
+            count=('amount', 'size'), total=('amount', 'sum'), total_sq=('amount_sq', 'sum')
+        )
+        for (month, category, sign), row in grouped.iterrows():
+            category = None if pd.isna(category) else category
+            self.cells[(month, category, int(sign))] = [int(row['count']), float(row['total']), float(row['total_sq'])]
+
+    def add(self, date, amount, category, weight=1):
+        """Add (or with weight=-1, remove) one transaction"""
+        amount = float(amount)
+        if math.isnan(amount):
+            return
+        key = (_month_key(pd.Timestamp(date)), category if isinstance(category, str) else None, _sign(amount))
+        cell = self.cells.setdefault(key, [0, 0.0, 0.0])
+        cell[0] += weight
+        cell[1] += weight * amount
+        cell[2] += weight * amount * amount
+        if cell[0] <= 0:
+            del self.cells[key]
+
+    def add_rows(self, rows):
+        for date, amount, category in zip(rows['date'], rows['amount'], rows['category']):
+            self.add(date, amount, category)
+
+    def _select(self, sign=None, since_month=None, month=None):
+        for (cell_month, category, cell_sign), cell in self.cells.items():
+            if sign is not None and cell_sign != sign:
+                continue
+            if month is not None and cell_month != month:
+                continue
+            if since_month is not None and cell_month < since_month:
+                continue
+            yield cell_month, category, cell_sign, cell
+
+    def income(self, **filters):
+        return sum(cell[1] for *_, cell in self._select(sign=1, **filters))
+
+    def expenses(self, **filters):
+        """Total expenses as a positive number"""
+        return -sum(cell[1] for *_, cell in self._select(sign=-1, **filters))
+
+    def category_totals(self, **filters):
+        """Signed amount per category"""
+        totals = {}
+        for _, category, _, cell in self._select(**filters):
+            if category is not None:
+                totals[category] = totals.get(category, 0.0) + cell[1]
+        return totals
+
+    def expenses_by_category(self, **filters):
+        """Expenses per category as positive numbers"""
+        return {category: -total for category, total in self.category_totals(sign=-1, **filters).items()}
+
+    def monthly_totals(self):
+        """Income and expenses per 'YYYY-MM' month"""
+        months = {}
+        for month, _, sign, cell in self._select():
+            if not month or sign == 0:
+                continue
+            totals = months.setdefault(month, {'income': 0.0, 'expenses': 0.0})
+            if sign > 0:
+                totals['income'] += cell[1]
+            else:
+                totals['expenses'] -= cell[1]
+        return dict(sorted(months.items()))
+
+    def category_stats(self):
+        """Count, mean and sample std of absolute amounts per category"""
+        sums = {}
+        for _, category, sign, cell in self._select():
+            if category is None:
+                continue
+            stats = sums.setdefault(category, [0, 0.0, 0.0])
+            stats[0] += cell[0]
+            stats[1] += abs(cell[1])
+            stats[2] += cell[2]
+
+        result = {}
+        for category, (count, total, total_sq) in sums.items():
+            mean = total / count
+            if count > 1:
+                std = math.sqrt(max((total_sq - count * mean * mean) / (count - 1), 0.0))
+            else:
+                std = float('nan')
+            result[category] = {'count': count, 'mean': mean, 'std': std}
+        return result
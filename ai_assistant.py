@@ -1,22 +1,85 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime, date as dt_date, timedelta
-import google.generativeai as genai
 import streamlit as st
 import plotly.express as px
 import json
 import uuid
 import time
-from financeAgent import FinanceAgent
+from financeAgent import FinanceAgent, CATEGORIES, MODEL_UNAVAILABLE
+from importer import preview as preview_statement
 from dotenv import load_dotenv
 import os
+import io
 
 load_dotenv()
-GOOGLE_API_KEY = st.secrets.get("GOOGLE_API_KEY") or os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel('gemini-2.0-flash')
 
 
+# Each session has its own agent. Everything derived from its data below is
+# memoized on the session's agent key plus agent.data_version /
+# agent.memory_version (and the filters), so reruns that don't change the data
+# skip the recomputation and sessions never see each other's results.
+
+
+@st.cache_data(max_entries=64)
+def category_breakdown_figure(_agent, agent_key, data_version):
+    expenses_by_category = _agent.aggregates.expenses_by_category()
+    if not expenses_by_category:
+        return None
+    category_spending = pd.DataFrame(
+        sorted(expenses_by_category.items()), columns=['category', 'amount']
+    )
+    return px.pie(
+        category_spending,
+        values='amount',
+        names='category',
+        title='Expense Breakdown',
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+
+
+@st.cache_data(max_entries=64)
+def recent_transactions(_agent, agent_key, data_version, n=5):
+    return _agent.df.nlargest(n, 'date')[['date', 'amount', 'description', 'category']]
+
+
+@st.cache_data(max_entries=64)
+def recurring_expenses(_agent, agent_key, data_version):
+    return [s for s in _agent.get_recurring_payments() if s['expected_amount'] < 0]
+
+
+@st.cache_data(max_entries=256)
+def filtered_transactions(_agent, agent_key, data_version, category, min_date, max_date):
+    """Transactions matching the history filters, newest first, with income/expense totals"""
+    filtered_df = _agent.df
+    if not filtered_df.empty:
+        if category != "All":
+            filtered_df = filtered_df[filtered_df['category'] == category]
+        filtered_df = filtered_df[
+            (filtered_df['date'].dt.date >= min_date) &
+            (filtered_df['date'].dt.date <= max_date)
+        ]
+    filtered_df = filtered_df.sort_values('date', ascending=False)
+    income = filtered_df[filtered_df['amount'] > 0]['amount'].sum()
+    expenses = filtered_df[filtered_df['amount'] < 0]['amount'].sum() * -1
+    return filtered_df, {'income': income, 'expenses': expenses, 'net': income - expenses}
+
+
+@st.cache_data(max_entries=256)
+def filtered_csv(_agent, agent_key, data_version, category, min_date, max_date):
+    filtered_df, _ = filtered_transactions(_agent, agent_key, data_version, category, min_date, max_date)
+    return filtered_df.to_csv(index=False).encode('utf-8')
+
+
+# The narratives are Futures, so these are kept as resources rather than pickled
+@st.cache_resource(max_entries=64)
+def budget_progress(_agent, agent_key, data_version, memory_version, month):
+    return _agent.check_budget_progress_async()
+
+
+@st.cache_resource(max_entries=64)
+def unusual_transactions(_agent, agent_key, data_version):
+    return _agent.detect_unusual_transactions_async()
+
 
 # Streamlit UI
 def main():
@@ -28,8 +91,10 @@ def main():
     
     if 'agent' not in st.session_state:
         st.session_state.agent = FinanceAgent()
+        st.session_state.agent_key = str(uuid.uuid4())
         
     agent = st.session_state.agent
+    agent_key = st.session_state.agent_key
     
     st.title("💰 AI Finance Agent")
     st.markdown("Your intelligent financial assistant with memory and insights")
@@ -63,6 +128,8 @@ def main():
         # Top financial insights
         st.subheader("💡 Financial Insights")
         insights = agent.memory.get('agent_insights', [])
+        if agent.insight_worker.busy:
+            st.caption("Updating insights with your latest transactions...")
         if insights:
             for insight in insights[-3:]:
                 st.info(insight)
@@ -73,8 +140,8 @@ def main():
         col1, col2, col3 = st.columns(3)
         
         # Calculate basic metrics
-        income = agent.df[agent.df['amount'] > 0]['amount'].sum()
-        expenses = agent.df[agent.df['amount'] < 0]['amount'].sum() * -1
+        income = agent.aggregates.income()
+        expenses = agent.aggregates.expenses()
         balance = income - expenses
         
         with col1:
@@ -87,39 +154,46 @@ def main():
         # Recent transactions
         st.subheader("Recent Transactions")
         if not agent.df.empty:
-            recent = agent.df.sort_values('date', ascending=False).head(5)
             st.dataframe(
-                recent[['date', 'amount', 'description', 'category']],
+                recent_transactions(agent, agent_key, agent.data_version),
                 use_container_width=True
             )
         else:
             st.write("No transactions yet. Add some to get started!")
         
-        # Category breakdown chart
         # Category breakdown chart
         st.subheader("Spending by Category")
-        if not agent.df.empty and len(agent.df[agent.df['amount'] < 0]) > 0:
-            expenses_df = agent.df[agent.df['amount'] < 0].copy()
-            expenses_df['amount'] = expenses_df['amount'].abs()
-            category_spending = expenses_df.groupby('category')['amount'].sum().reset_index()
-            
-            fig = px.pie(
-                category_spending, 
-                values='amount', 
-                names='category',
-                title='Expense Breakdown',
-                color_discrete_sequence=px.colors.qualitative.Pastel
-            )
+        fig = category_breakdown_figure(agent, agent_key, agent.data_version)
+        if fig is not None:
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.write("Add expense transactions to see category breakdown")
         
-        # Budget progress
-        st.subheader("Budget Progress")
+        # Subscriptions and other regular bills
+        st.subheader("🔁 Recurring Payments")
+        recurring = recurring_expenses(agent, agent_key, agent.data_version)
+        if recurring:
+            st.metric("Recurring costs per month", f"${-sum(s['monthly_amount'] for s in recurring):.2f}")
+            recurring_df = pd.DataFrame(recurring)[['merchant', 'category', 'cadence', 'expected_amount', 'next_due']]
+            st.dataframe(
+                recurring_df.rename(columns={'expected_amount': 'amount', 'next_due': 'next due'}),
+                use_container_width=True
+            )
+        else:
+            st.write("No recurring payments detected yet.")
+        
+        # Budget progress and unusual transactions: both narratives are requested
+        # up front and run concurrently while the numbers render
         budget_goals = agent.memory.get('user_preferences', {}).get('budget_goals', {})
+        progress_df, narrative = budget_progress(
+            agent, agent_key, agent.data_version, agent.memory_version, datetime.now().strftime('%Y-%m')
+        )
+        unusual_df, explanation = unusual_transactions(agent, agent_key, agent.data_version)
+        
+        st.subheader("Budget Progress")
         if budget_goals:
-            progress_df, narrative = agent.check_budget_progress()
-            st.write(narrative)
+            narrative_placeholder = st.empty()
+            narrative_placeholder.caption("Writing budget summary...")
             
             # Format progress as horizontal bars
             if not progress_df.empty:
@@ -132,11 +206,17 @@ def main():
             st.info("No budget goals set. Set them in the Budget & Goals section.")
             
         # Unusual transactions alert
-        unusual_df, explanation = agent.detect_unusual_transactions()
         if unusual_df is not None and not unusual_df.empty:
             st.subheader("⚠️ Unusual Transaction Alert")
-            st.warning(explanation)
+            explanation_placeholder = st.empty()
+            explanation_placeholder.caption("Looking into these transactions...")
             st.dataframe(unusual_df[['date', 'description', 'amount', 'category']])
+        
+        # Fill in the narratives as they arrive
+        if budget_goals:
+            narrative_placeholder.write(narrative.result())
+        if unusual_df is not None and not unusual_df.empty:
+            explanation_placeholder.warning(explanation.result())
     
     elif page == "Transactions":
         st.header("Manage Transactions")
@@ -154,8 +234,13 @@ def main():
             
             if st.button("Add Transaction", type="primary"):
                 if description and amount != 0:
-                    category, _ = agent.add_transaction(date, amount, description)
+                    category, transaction_id = agent.add_transaction(date, amount, description)
                     st.success(f"Transaction added and categorized as: {category}")
+                    alert = next((alert for alert in agent.memory.get('unusual_alerts', [])
+                                  if alert['transaction_id'] == transaction_id), None)
+                    if alert:
+                        st.warning(f"This is {alert['z_score']:.1f} standard deviations above "
+                                   f"your usual {category} spending.")
                 else:
                     st.error("Please enter a description and non-zero amount")
         
@@ -181,37 +266,26 @@ def main():
             )
             
         # Apply filters
-        filtered_df = agent.df.copy()
-        if not filtered_df.empty:
-            if filter_category != "All":
-                filtered_df = filtered_df[filtered_df['category'] == filter_category]
-                
-            filtered_df = filtered_df[
-                (filtered_df['date'].dt.date >= filter_min_date) & 
-                (filtered_df['date'].dt.date <= filter_max_date)
-            ]
+        filters = (filter_category, filter_min_date, filter_max_date)
+        filtered_df, summary = filtered_transactions(agent, agent_key, agent.data_version, *filters)
         
         # Show filtered data
         if not filtered_df.empty:
             st.dataframe(
-                filtered_df.sort_values('date', ascending=False)[['date', 'amount', 'description', 'category']],
+                filtered_df[['date', 'amount', 'description', 'category']],
                 use_container_width=True
             )
             
             # Summary stats
-            income = filtered_df[filtered_df['amount'] > 0]['amount'].sum()
-            expenses = filtered_df[filtered_df['amount'] < 0]['amount'].sum() * -1
-            balance = income - expenses
-            
             st.markdown(f"""
             **Summary for selected period:**
-            - Income: ${income:.2f}
-            - Expenses: ${expenses:.2f}
-            - Net: ${balance:.2f}
+            - Income: ${summary['income']:.2f}
+            - Expenses: ${summary['expenses']:.2f}
+            - Net: ${summary['net']:.2f}
             """)
             
             # Download option
-            csv = filtered_df.to_csv(index=False).encode('utf-8')
+            csv = filtered_csv(agent, agent_key, agent.data_version, *filters)
             st.download_button(
                 "Download Filtered Data",
                 csv,
@@ -219,8 +293,50 @@ def main():
                 "text/csv",
                 key='download-csv'
             )
+
+            # Full history in the original Excel format. Writing xlsx is slow on
+            # large histories, so it is only built when asked for and kept for
+            # this session until the data changes.
+            export = st.session_state.get('excel_export')
+            if export is None or export[0] != agent.data_version:
+                if st.button("Prepare Excel Export of All Transactions"):
+                    with st.spinner("Writing Excel file..."):
+                        excel_buffer = io.BytesIO()
+                        agent.export_excel(excel_buffer)
+                    export = st.session_state.excel_export = (agent.data_version, excel_buffer.getvalue())
+            if export is not None and export[0] == agent.data_version:
+                st.download_button(
+                    "Export All Transactions (Excel)",
+                    export[1],
+                    "transactions.xlsx",
+                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key='download-xlsx'
+                )
         else:
             st.info("No transactions match your filters or no transactions added yet.")
+
+        # Fix a category; the correction is remembered for that merchant
+        if not filtered_df.empty:
+            with st.expander("Re-categorize a Transaction"):
+                recent_filtered = filtered_df.sort_values('date', ascending=False)
+                transaction_id = st.selectbox(
+                    "Transaction",
+                    recent_filtered['transaction_id'],
+                    format_func=lambda tid: "{:%Y-%m-%d} | {} | ${:.2f} | {}".format(
+                        *recent_filtered.loc[recent_filtered['transaction_id'] == tid,
+                                             ['date', 'description', 'amount', 'category']].iloc[0]
+                    )
+                )
+                new_category = st.selectbox("New category", CATEGORIES)
+                if st.button("Update Category"):
+                    agent.recategorize_transaction(transaction_id, new_category)
+                    st.success(f"Transaction re-categorized as: {new_category}")
+
+            cache_stats = agent.category_cache.stats()
+            st.caption(
+                f"Category cache: {cache_stats['size']} merchants, "
+                f"{cache_stats['hit_rate'] * 100:.0f}% hit rate this session"
+            )
             
         # Bulk import section
         with st.expander("Bulk Import"):
@@ -237,31 +353,39 @@ def main():
             uploaded_file = st.file_uploader("Choose a file", type=['csv', 'xlsx'])
             if uploaded_file is not None:
                 try:
-                    if uploaded_file.name.endswith('.csv'):
-                        import_df = pd.read_csv(uploaded_file)
-                    else:
-                        import_df = pd.read_excel(uploaded_file)
-                        
                     st.write("Preview:")
-                    st.dataframe(import_df.head())
+                    st.dataframe(preview_statement(uploaded_file, uploaded_file.name))
                     
+                    skip_suspected = st.checkbox(
+                        "Also skip possible duplicates (same amount and merchant within a few days)",
+                        value=False
+                    )
                     if st.button("Import Data"):
-                        # Basic validation
-                        required_cols = ['date', 'amount', 'description']
-                        if all(col in import_df.columns for col in required_cols):
-                            for _, row in import_df.iterrows():
-                                try:
-                                    agent.add_transaction(
-                                        pd.to_datetime(row['date']), 
-                                        float(row['amount']),
-                                        str(row['description'])
-                                    )
-                                except Exception as e:
-                                    st.error(f"Error importing row: {e}")
-                            
-                            st.success(f"Successfully imported {len(import_df)} transactions!")
-                        else:
-                            st.error(f"File must contain these columns: {', '.join(required_cols)}")
+                        progress_bar = st.progress(0, text="Importing transactions...")
+
+                        def report(fraction, summary):
+                            progress_bar.progress(
+                                int((fraction or 0) * 100),
+                                text=f"Imported {summary['imported']} transactions..."
+                            )
+
+                        summary = agent.import_file(uploaded_file, uploaded_file.name, progress=report,
+                                                    skip_suspected=skip_suspected)
+                        progress_bar.progress(100, text="Import complete")
+
+                        if summary['skipped']:
+                            st.info(f"Skipped {summary['skipped']} transactions already in your history")
+                        if summary['suspected']:
+                            verb = "Skipped" if skip_suspected else "Imported"
+                            st.info(
+                                f"{verb} {summary['suspected']} possible duplicates: same amount and "
+                                f"merchant within a few days of an existing transaction"
+                            )
+                        if summary['invalid']:
+                            st.warning(f"Skipped {summary['invalid']} rows with an invalid date, amount or description")
+                        st.success(f"Successfully imported {summary['imported']} transactions!")
+                except ValueError as e:
+                    st.error(str(e))
                 except Exception as e:
                     st.error(f"Error reading file: {e}")
     
@@ -344,9 +468,11 @@ def main():
             st.dataframe(budget_df, use_container_width=True)
             
             # Check budget progress
-            progress_df, narrative = agent.check_budget_progress()
+            progress_df, narrative = budget_progress(
+                agent, agent_key, agent.data_version, agent.memory_version, datetime.now().strftime('%Y-%m')
+            )
             st.subheader("Current Month Progress")
-            st.write(narrative)
+            st.write(narrative.result())
             
             if not progress_df.empty:
                 progress_formatted = progress_df.copy()
@@ -386,6 +512,15 @@ def main():
                 with st.spinner("Creating your personalized savings plan..."):
                     saving_plan = agent.create_saving_plan(goal_amount, timeframe)
                     st.success("Savings plan created!")
+                    
+                    # Projected savings against the goal, from the same forecast the plan narrates
+                    forecast = agent.forecast_saving_plan(goal_amount, timeframe)
+                    fig = px.line(
+                        forecast.monthly.reset_index(names='month'), x='month', y='cumulative',
+                        markers=True, title='Projected Savings', labels={'cumulative': 'Saved ($)'}
+                    )
+                    fig.add_hline(y=goal_amount, line_dash='dash', annotation_text='Goal')
+                    st.plotly_chart(fig, use_container_width=True)
                     st.markdown(saving_plan)
         
         # Budget recommendation
@@ -446,8 +581,7 @@ def main():
                     Format your response in clear sections with headers using markdown.
                     """
                     
-                    response = model.generate_content(prompt)
-                    health_check = response.text.strip()
+                    health_check = agent.generate_text(prompt, MODEL_UNAVAILABLE, 'health_check')
                     st.markdown(health_check)
     
     elif page == "Chat":
@@ -495,5 +629,22 @@ def main():
                 st.markdown("- \"Show me my spending trends\"")
                 st.markdown("- \"What's my financial health like?\"")
 
+    # Model call latency, tokens and cost per calling method; rendered last so
+    # it includes this run's calls
+    with st.sidebar.expander("⚡ Performance"):
+        llm_stats = agent.llm_metrics.summary()
+        if llm_stats:
+            st.dataframe(
+                pd.DataFrame(llm_stats)[['call_site', 'calls', 'p50_s', 'p90_s', 'p99_s', 'cache_hits',
+                                         'prompt_tokens', 'response_tokens', 'cost', 'errors']],
+                hide_index=True
+            )
+            st.download_button("Export JSON", agent.llm_metrics.to_json(), "llm_metrics.json",
+                               "application/json", key='download-llm-json')
+            st.download_button("Export Prometheus", agent.llm_metrics.to_prometheus(), "llm_metrics.prom",
+                               "text/plain", key='download-llm-prom')
+        else:
+            st.caption("No model calls yet.")
+
 if __name__ == "__main__":
     main()
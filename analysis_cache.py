@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def normalize_query(query):
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return ' '.join(str(query).lower().split()).rstrip('?.! ')
+
+
+def schema_signature(df):
+    return [[str(column), str(dtype)] for column, dtype in df.dtypes.items()]
+
+
+class AnalysisCache:
+    """Disk-backed cache of validated analysis code, keyed on query and DataFrame schema
+
+    Source is stored on disk; compiled code objects are kept in memory so a
+    repeated analysis only re-runs the code. Entries whose execution fails
+    are marked invalid and regenerated on the next request.
+    """
+
+    def __init__(self, path='analysis_cache.json'):
+        self.path = path
+        self._entries = {}
+        self._compiled = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self._entries = json.load(f)
+            except ValueError as e:
+                print(f"Ignoring unreadable analysis cache: {e}")
+
+    def key(self, query, df):
+        signature = json.dumps([normalize_query(query), schema_signature(df)])
+        return hashlib.sha256(signature.encode('utf-8')).hexdigest()
+
+    def get(self, query, df):
+        """Return (source, code object) for a valid cached analysis, or None"""
+        key = self.key(query, df)
+        entry = self._entries.get(key)
+        if entry is None or not entry.get('valid', True):
+            return None
+        code = self._compiled.get(key)
+        if code is None:
+            try:
+                code = compile(entry['code'], f"<analysis {key[:8]}>", 'exec')
+            except SyntaxError:
+                self.invalidate(query, df)
+                return None
+            self._compiled[key] = code
+        return entry['code'], code
+
+    def put(self, query, df, source, code):
+        key = self.key(query, df)
+        self._entries[key] = {
+            'query': normalize_query(query),
+            'code': source,
+            'valid': True,
+            'created': time.time()
+        }
+        self._compiled[key] = code
+        self._save()
+
+    def invalidate(self, query, df):
+        key = self.key(query, df)
+        self._compiled.pop(key, None)
+        if key in self._entries:
+            self._entries[key]['valid'] = False
+            self._save()
+
+    def _save(self):
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
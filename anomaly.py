@@ -0,0 +1,98 @@
+import math
+import pandas as pd
+
+# Scale factor that makes the MAD comparable to a standard deviation for normal data
+MAD_SCALE = 0.6745
+
+
+def zscore_outliers(df, k=2.0, min_count=3, stats=None):
+    """Mask of rows whose absolute amount is more than k std above their category mean
+
+    Per-category count/mean/std come from `stats` when given (e.g. the
+    aggregate engine), otherwise from a grouped transform.
+    """
+    amounts = df['amount'].abs()
+    if stats is not None:
+        count = df['category'].map({cat: s['count'] for cat, s in stats.items()})
+        mean = df['category'].map({cat: s['mean'] for cat, s in stats.items()})
+        std = df['category'].map({cat: s['std'] for cat, s in stats.items()})
+    else:
+        grouped = amounts.groupby(df['category'])
+        count = grouped.transform('count')
+        mean = grouped.transform('mean')
+        std = grouped.transform('std')
+    return (count >= min_count) & (amounts > mean + k * std)
+
+
+def robust_outliers(df, k=3.5, min_count=3):
+    """Mask of rows whose modified z-score (median/MAD) exceeds k within their category"""
+    amounts = df['amount'].abs()
+    grouped = amounts.groupby(df['category'])
+    median = grouped.transform('median')
+    deviation = (amounts - median).abs()
+    mad = deviation.groupby(df['category']).transform('median')
+    count = grouped.transform('count')
+    score = MAD_SCALE * (amounts - median) / mad.where(mad > 0)
+    return (count >= min_count) & (score > k)
+
+
+def rolling_outliers(df, window=30, k=2.0, min_count=3):
+    """Mask of rows more than k std above the mean of the previous `window` rows in their category"""
+    ordered = df.assign(_abs=df['amount'].abs()).sort_values('date', kind='stable')
+    rolling = ordered.groupby('category')['_abs'].rolling(window, min_periods=min_count)
+    # Shift by one so each row is compared with the history before it
+    mean = rolling.mean().groupby(level=0).shift(1).reset_index(level=0, drop=True)
+    std = rolling.std().groupby(level=0).shift(1).reset_index(level=0, drop=True)
+    mask = ordered['_abs'] > mean.reindex(ordered.index) + k * std.reindex(ordered.index)
+    return mask.reindex(df.index, fill_value=False)
+
+
+DETECTORS = {
+    'zscore': zscore_outliers,
+    'robust': robust_outliers,
+    'rolling': rolling_outliers,
+}
+
+
+class OnlineCategoryStats:
+    """Running count, mean and M2 of absolute amounts per category (Welford's algorithm)"""
+
+    def __init__(self):
+        self.stats = {}
+
+    def build(self, df):
+        amounts = df['amount'].abs().groupby(df['category'])
+        frame = pd.DataFrame({'count': amounts.count(), 'mean': amounts.mean(), 'var': amounts.var(ddof=0)})
+        self.stats = {
+            category: [int(row['count']), float(row['mean']), float(row['var']) * int(row['count'])]
+            for category, row in frame.iterrows() if row['count'] > 0
+        }
+
+    def update(self, category, amount, weight=1):
+        """Add (or with weight=-1, remove) one amount"""
+        value = abs(float(amount))
+        count, mean, m2 = self.stats.get(category, [0, 0.0, 0.0])
+        if weight > 0:
+            count += 1
+            delta = value - mean
+            mean += delta / count
+            m2 += delta * (value - mean)
+        elif count <= 1:
+            self.stats.pop(category, None)
+            return
+        else:
+            count -= 1
+            delta = value - mean
+            mean -= delta / count
+            m2 -= delta * (value - mean)
+        self.stats[category] = [count, mean, max(m2, 0.0)]
+
+    def zscore(self, category, amount, min_count=3):
+        """How many sample std the amount sits above its category mean, or None without enough history"""
+        count, mean, m2 = self.stats.get(category, [0, 0.0, 0.0])
+        if count < min_count:
+            return None
+        std = math.sqrt(m2 / (count - 1))
+        if std == 0:
+            return None
+        return (abs(float(amount)) - mean) / std
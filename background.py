@@ -0,0 +1,78 @@
+import queue
+import threading
+
+_STOP = object()
+
+
+class DebouncedWorker:
+    """Runs a task on a background thread once a burst of requests goes quiet
+
+    Each notify() queues a request; the worker keeps absorbing requests until
+    none arrive for `debounce` seconds and then runs the task once for all of them.
+    """
+
+    def __init__(self, task, debounce=2.0, name='debounced-worker'):
+        self.task = task
+        self.debounce = debounce
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+
+    @property
+    def busy(self):
+        return not self._idle.is_set()
+
+    def notify(self):
+        with self._lock:
+            self._pending += 1
+            self._idle.clear()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        self._queue.put(None)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            requests = 0
+            item = self._queue.get()
+            if item is _STOP:
+                stopping = True
+            else:
+                requests += 1
+
+            # Debounce: keep absorbing requests until the burst goes quiet
+            while not stopping:
+                try:
+                    item = self._queue.get(timeout=self.debounce)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                else:
+                    requests += 1
+
+            if requests:
+                try:
+                    self.task()
+                except Exception as e:
+                    print(f"Error in background task {self.name}: {e}")
+
+            with self._lock:
+                self._pending -= requests
+                if self._pending == 0:
+                    self._idle.set()
+
+    def wait(self, timeout=None):
+        """Block until all queued requests have been processed"""
+        return self._idle.wait(timeout)
+
+    def close(self):
+        """Run any pending work and stop the worker thread"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
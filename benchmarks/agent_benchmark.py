@@ -0,0 +1,166 @@
+"""Timings of the main FinanceAgent operations on synthetic histories
+
+Each history size gets a fresh store in a temporary directory and an agent
+talking to the offline stub backend, so model calls cost exactly `--latency`
+seconds and nothing leaves the machine.
+
+    python benchmarks/agent_benchmark.py --rows 10000 100000 [--latency 0.2] [--output results.json]
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import generate_transactions  # noqa: E402
+from financeAgent import FinanceAgent  # noqa: E402
+from llm_client import LLMClient, StubBackend  # noqa: E402
+from transaction_store import open_store  # noqa: E402
+
+BUDGET_GOALS = {'Food': 600, 'Shopping': 300, 'Entertainment': 150, 'Transportation': 250}
+SIMILAR_QUERIES = ['Whole Foods Market #4411', 'UBER *TRIP HELP.UBER.COM', 'Netflix subscription', 'Corner bakery']
+
+
+def timed(function, repeat):
+    """Seconds for the first call (cold) and the median/min over `repeat` calls"""
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function(i)
+        timings.append(time.perf_counter() - start)
+    return {
+        'first_s': round(timings[0], 4),
+        'median_s': round(statistics.median(timings), 4),
+        'min_s': round(min(timings), 4),
+        'runs': repeat,
+    }
+
+
+def stub_model(latency):
+    # No rate limit and no response cache: every call pays the simulated latency
+    return LLMClient(StubBackend(latency), rate=1e6, burst=10 ** 6, max_concurrency=64)
+
+
+def close_agent(agent):
+    agent.insight_worker.close()
+    agent.store.close()
+
+
+def dashboard_pass(agent):
+    """The data the Dashboard page computes on a cold render"""
+    agent.aggregates.income()
+    agent.aggregates.expenses()
+    agent.df.nlargest(5, 'date')
+    agent.aggregates.expenses_by_category()
+    agent.get_recurring_payments()
+    progress_df, narrative = agent.check_budget_progress_async()
+    unusual_df, explanation = agent.detect_unusual_transactions_async()
+    narrative.result()
+    explanation.result()
+
+
+def run_size(rows, args):
+    workdir = tempfile.mkdtemp(prefix='finance-bench-')
+    try:
+        file_path = os.path.join(workdir, 'transactions.xlsx')
+        memory_path = os.path.join(workdir, 'agent_memory.json')
+
+        started = time.perf_counter()
+        history = generate_transactions(rows, years=args.years, seed=args.seed)
+        store = open_store(os.path.join(workdir, 'transactions.db'))
+        store.append(history)
+        store.compact(background=False)
+        store.close()
+        result = {'rows': len(history), 'setup_s': round(time.perf_counter() - started, 3)}
+
+        model = stub_model(args.latency)
+        agents = []
+
+        def init(i):
+            agents.append(FinanceAgent(file_path=file_path, memory_path=memory_path, model=model))
+            agents[-1].df  # include loading the history
+            if i < args.repeat - 1:
+                close_agent(agents.pop())
+
+        result['init'] = timed(init, args.repeat)
+        agent = agents[-1]
+        for category, amount in BUDGET_GOALS.items():
+            agent.set_budget_goal(category, amount)
+
+        # New merchants each time so categorization reaches the model
+        result['add_transaction'] = timed(
+            lambda i: agent.add_transaction(datetime.now(), -12.5 - i, f"Benchmark merchant {i} downtown"),
+            args.repeat
+        )
+
+        # Rows after the history, so none are skipped as duplicates
+        batch = generate_transactions(args.import_rows, years=1, seed=args.seed + 1, id_prefix='import')
+        batch['date'] = batch['date'] + (history['date'].max() - batch['date'].min()) + pd.Timedelta(days=1)
+        batch['description'] = batch['description'] + ' online'
+        import_path = os.path.join(workdir, 'import.csv')
+        batch.drop(columns=['category', 'transaction_id']).to_csv(import_path, index=False)
+
+        def bulk_import(i):
+            with open(import_path, 'rb') as source:
+                agent.import_file(source, 'import.csv', workers=args.workers)
+
+        result['bulk_import'] = {**timed(bulk_import, 1), 'rows': len(batch)}
+
+        result['find_similar_transactions'] = timed(
+            lambda i: agent.find_similar_transactions(SIMILAR_QUERIES[i % len(SIMILAR_QUERIES)]),
+            max(args.repeat, len(SIMILAR_QUERIES))
+        )
+        result['check_budget_progress'] = timed(lambda i: agent.check_budget_progress(), args.repeat)
+        result['detect_unusual_transactions'] = timed(lambda i: agent.detect_unusual_transactions(), args.repeat)
+
+        # Reload so the pass starts from cold derived structures
+        agent.df = agent.store.load()
+        result['dashboard_pass'] = timed(lambda i: dashboard_pass(agent), args.repeat)
+
+        result['model_calls'] = model.backend.calls
+        result['llm_call_sites'] = agent.llm_metrics.summary()
+        close_agent(agent)
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000], help="history sizes to benchmark")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds per simulated model call")
+    parser.add_argument('--import-rows', type=int, default=5000, help="rows in the bulk import")
+    parser.add_argument('--workers', type=int, default=4, help="concurrent categorization batches on import")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'python': sys.version.split()[0],
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'sizes': [],
+    }
+    # The agent's progress messages would interleave with the JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        for rows in args.rows:
+            results['sizes'].append(run_size(rows, args))
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
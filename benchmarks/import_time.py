@@ -0,0 +1,61 @@
+"""Cold-start import time of the agent core versus the UI and model libraries
+
+Each import runs in a fresh interpreter so nothing is cached between runs.
+
+    python benchmarks/import_time.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What used to be loaded by `import financeAgent`, for comparison
+TARGETS = {
+    'financeAgent': 'import financeAgent',
+    'ui and model libraries': ('import streamlit, plotly.express, matplotlib.pyplot, '
+                               'google.generativeai'),
+    'pandas baseline': 'import pandas',
+}
+HEAVY_MODULES = ['streamlit', 'plotly', 'matplotlib', 'google.generativeai']
+
+PROBE = """
+import sys, time, warnings
+warnings.simplefilter('ignore')
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed, ','.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def time_import(statement, runs):
+    timings = []
+    loaded = ''
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        timings.append(float(output[0]))
+        loaded = output[1] if len(output) > 1 else ''
+    return {
+        'median_s': round(statistics.median(timings), 3),
+        'min_s': round(min(timings), 3),
+        'heavy_modules_loaded': loaded.split(',') if loaded else []
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    results = {name: time_import(statement, args.runs) for name, statement in TARGETS.items()}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Synthetic transaction histories for benchmarks
+
+    python benchmarks/synthetic.py 100000 history.csv [--years 5] [--seed 0]
+
+Histories mix monthly recurring payments (salary, rent, bills, subscriptions)
+with discretionary spending whose frequency and size follow the season, and
+merchants repeat with store numbers the way real statement lines do.
+"""
+import argparse
+import numpy as np
+import pandas as pd
+
+# (description, category, day of month, amount)
+RECURRING = [
+    ('ACME CORP PAYROLL', 'Income', 1, 4200.00),
+    ('Monthly rent payment', 'Housing', 1, -1450.00),
+    ('CITY POWER & WATER', 'Utilities', 15, -110.00),
+    ('COMCAST INTERNET', 'Utilities', 18, -79.99),
+    ('NETFLIX.COM', 'Entertainment', 7, -15.49),
+    ('SPOTIFY USA', 'Entertainment', 12, -10.99),
+    ('PLANET FITNESS', 'Healthcare', 20, -24.99),
+    ('STATE FARM INSURANCE', 'Transportation', 25, -132.40),
+]
+
+# (description, category, relative frequency, median amount, stores)
+DISCRETIONARY = [
+    ('WHOLE FOODS MARKET', 'Food', 10, 64.0, 12),
+    ('TRADER JOES', 'Food', 8, 48.0, 8),
+    ('STARBUCKS', 'Food', 12, 6.5, 40),
+    ('CHIPOTLE', 'Food', 5, 14.0, 15),
+    ('UBER TRIP', 'Transportation', 6, 18.0, 1),
+    ('SHELL OIL', 'Transportation', 4, 45.0, 20),
+    ('AMAZON MKTPLACE', 'Shopping', 7, 38.0, 1),
+    ('TARGET', 'Shopping', 4, 55.0, 10),
+    ('AMC THEATRES', 'Entertainment', 1.5, 28.0, 5),
+    ('CVS PHARMACY', 'Healthcare', 2, 22.0, 15),
+    ('COURSERA', 'Education', 0.3, 49.0, 1),
+    ('DELTA AIR LINES', 'Travel', 0.4, 380.0, 1),
+    ('MARRIOTT HOTELS', 'Travel', 0.3, 240.0, 30),
+]
+
+# Spending multiplier per calendar month (January first) and category
+SEASONALITY = {
+    'Shopping': [0.8, 0.8, 0.9, 0.9, 1.0, 1.0, 1.0, 1.0, 1.1, 1.1, 1.4, 2.0],
+    'Travel': [0.6, 0.6, 0.9, 0.9, 1.0, 1.6, 2.0, 1.8, 0.9, 0.8, 0.8, 1.5],
+    'Food': [1.0, 0.9, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.1, 1.3],
+    'Utilities': [1.4, 1.3, 1.1, 0.9, 0.8, 0.9, 1.2, 1.2, 0.9, 0.8, 1.0, 1.3],
+}
+
+
+def series_code(number):
+    """Letters-only code telling copies of a recurring series apart (digits are normalized away)"""
+    code = ''
+    while True:
+        number, letter = divmod(number, 26)
+        code = chr(ord('A') + letter) + code
+        if number == 0:
+            return code.rjust(3, 'A')
+
+
+def generate_transactions(n_rows, years=5, end=None, seed=0, id_prefix='syn'):
+    """DataFrame of about `n_rows` categorized transactions ending at `end` (default: today)
+
+    Columns match the transaction store (date, amount, description, category,
+    transaction_id). Recurring payments take at most a quarter of the rows;
+    larger histories get proportionally more recurring series.
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end or pd.Timestamp.now()).normalize()
+    days = pd.date_range(end - pd.DateOffset(years=years), end, freq='D')
+    months = pd.period_range(days[0], days[-1], freq='M')
+    frames = []
+
+    # Recurring series, copied as many times as the row budget allows
+    copies = max(1, n_rows // (4 * len(RECURRING) * len(months)))
+    suffixes = np.repeat([' ' + series_code(copy) for copy in range(copies)] if copies > 1 else [''], len(months))
+    starts = np.tile(months.to_timestamp(), copies)
+    for description, category, day, amount in RECURRING:
+        dates = starts + pd.to_timedelta(day - 1 + rng.integers(0, 2, len(starts)), unit='D')
+        factor = np.asarray(SEASONALITY.get(category, [1.0] * 12))[dates.month - 1]
+        jitter = 1 + rng.normal(0, 0.03 if category in SEASONALITY else 0.0, len(dates))
+        frames.append(pd.DataFrame({
+            'date': dates,
+            'amount': np.round(amount * factor * jitter, 2),
+            'description': np.char.add(description, suffixes).astype(object),
+            'category': category,
+        }))
+    recurring_rows = sum(len(frame) for frame in frames)
+
+    # Discretionary spending: merchant by frequency, day weighted by the season
+    remaining = max(n_rows - recurring_rows, 0)
+    weights = np.array([merchant[2] for merchant in DISCRETIONARY])
+    counts = rng.multinomial(remaining, weights / weights.sum())
+    for (description, category, _, median, stores), count in zip(DISCRETIONARY, counts):
+        if count == 0:
+            continue
+        season = np.asarray(SEASONALITY.get(category, [1.0] * 12))[days.month - 1]
+        dates = days[rng.choice(len(days), size=count, p=season / season.sum())]
+        amounts = -np.round(median * rng.lognormal(0, 0.5, count), 2)
+        if stores > 1:
+            numbers = pd.Series(rng.integers(100, 100 + stores, count)).astype(str)
+            descriptions = (description + ' #' + numbers).to_numpy()
+        else:
+            descriptions = description
+        frames.append(pd.DataFrame({
+            'date': dates + pd.to_timedelta(rng.integers(8 * 3600, 22 * 3600, count), unit='s'),
+            'amount': amounts,
+            'description': descriptions,
+            'category': category,
+        }))
+
+    df = pd.concat(frames, ignore_index=True).sort_values('date', kind='stable', ignore_index=True)
+    df = df[df['date'] <= end + pd.Timedelta(days=1)].reset_index(drop=True)
+    df['transaction_id'] = id_prefix + '-' + pd.Series(np.arange(len(df))).astype(str).str.zfill(9)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('rows', type=int)
+    parser.add_argument('output', help=".csv or .xlsx file to write")
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    df = generate_transactions(args.rows, years=args.years, seed=args.seed)
+    if args.output.endswith('.csv'):
+        df.to_csv(args.output, index=False)
+    else:
+        df.to_excel(args.output, index=False)
+    print(f"Wrote {len(df)} transactions to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+DATE_PATTERN = re.compile(r'\b\d{1,4}[/.-]\d{1,2}(?:[/.-]\d{1,4})?\b')
+STORE_NUMBER_PATTERN = re.compile(r'(?:#|\bno\.?\s*|\bstore\s*|\bref\s*)\d+', re.IGNORECASE)
+NON_LETTERS = re.compile(r'[^a-z]+')
+
+
+def normalize_description(description):
+    """Reduce a transaction description to its merchant words
+
+    Drops dates, store/reference numbers, digits, punctuation and casing, so
+    "UBER *TRIP 04/12 #8812" and "Uber trip" normalize to the same text.
+    """
+    text = str(description).lower()
+    text = DATE_PATTERN.sub(' ', text)
+    text = STORE_NUMBER_PATTERN.sub(' ', text)
+    return ' '.join(NON_LETTERS.sub(' ', text).split())
+
+
+def cache_key(description, amount):
+    """Cache key from the normalized description and the sign of the amount"""
+    sign = '-' if float(amount) < 0 else '+'
+    return f"{sign}|{normalize_description(description)}"
+
+
+def cache_keys(descriptions, amounts):
+    """cache_key for many rows as an object array; each distinct description is normalized once"""
+    if len(descriptions) < 64:
+        return np.array([cache_key(d, a) for d, a in zip(descriptions, amounts)], dtype=object)
+    codes, uniques = pd.factorize(pd.Series(descriptions))
+    # Code -1 (missing) picks the last entry
+    normalized = np.array([normalize_description(d) for d in uniques] + [normalize_description(None)],
+                          dtype=object)[codes]
+    signs = np.where(pd.to_numeric(pd.Series(amounts), errors='coerce').to_numpy(dtype=float) < 0, '-|', '+|')
+    return signs.astype(object) + normalized
+
+
+class CategoryCache:
+    """Disk-backed LRU cache of description -> category answers"""
+
+    def __init__(self, path='category_cache.json', max_entries=5000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self._entries = OrderedDict(json.load(f))
+            except (ValueError, OSError) as e:
+                print(f"Ignoring unreadable category cache: {e}")
+
+    def get(self, description, amount):
+        key = cache_key(description, amount)
+        with self._lock:
+            category = self._entries.get(key)
+            if category is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return category
+
+    def put(self, description, amount, category):
+        key = cache_key(description, amount)
+        with self._lock:
+            self._entries[key] = category
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def invalidate(self, description, amount):
+        with self._lock:
+            if self._entries.pop(cache_key(description, amount), None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """Write the cache to disk if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(list(self._entries.items()), f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._entries)
+        }
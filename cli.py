@@ -0,0 +1,183 @@
+"""Headless entry point for batch FinanceAgent jobs
+
+    python cli.py --workers 4 import statement.csv
+    python cli.py categorize --category Other
+    python cli.py recompute-aggregates
+    python cli.py detect-anomalies --method robust
+    python cli.py budget-report
+    python cli.py export transactions.csv
+
+Results are streamed to stdout as JSON lines; the agent's own log messages go
+to stderr so the output can be piped into other tools.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+# Keep the stdout we stream results to; everything else printed goes to stderr
+_out = sys.stdout
+
+
+def emit(record):
+    _out.write(json.dumps(record, default=str) + "\n")
+    _out.flush()
+
+
+def emit_rows(df, columns, **extra):
+    for row in df[columns].itertuples(index=False):
+        emit({**extra, **{column: value for column, value in zip(columns, row)}})
+
+
+def cmd_import(agent, args):
+    started = time.perf_counter()
+
+    def progress(fraction, summary):
+        emit({'event': 'progress', 'fraction': fraction, **summary})
+
+    with open(args.file, 'rb') as source:
+        summary = agent.import_file(
+            source, os.path.basename(args.file), chunksize=args.chunksize, progress=progress,
+            skip_duplicates=not args.keep_duplicates, skip_suspected=args.skip_suspected, workers=args.workers
+        )
+    emit({'event': 'done', 'seconds': round(time.perf_counter() - started, 3), **summary})
+
+
+def cmd_categorize(agent, args):
+    from financeAgent import CATEGORIES
+
+    df = agent.df
+    if args.category:
+        targets = df[df['category'] == args.category]
+    else:
+        targets = df[~df['category'].isin(CATEGORIES)]
+    emit({'event': 'start', 'transactions': len(targets)})
+
+    changed = 0
+    for start in range(0, len(targets), args.chunksize):
+        chunk = targets.iloc[start:start + args.chunksize]
+        categories = agent.categorize_transactions(
+            chunk, batch_size=args.batch_size, workers=args.workers, fresh=bool(args.category)
+        )
+        updates = dict(zip(chunk['transaction_id'], categories))
+        changed += agent.recategorize_transactions(updates)
+        for (_, row), category in zip(chunk.iterrows(), categories):
+            if category != row['category']:
+                emit({'transaction_id': row['transaction_id'], 'description': row['description'],
+                      'old': row['category'], 'new': category})
+    emit({'event': 'done', 'changed': changed})
+
+
+def cmd_recompute_aggregates(agent, args):
+    agent.store.compact(background=False)
+    agent.df = agent.store.load()  # drops every derived structure
+    for month, totals in agent.aggregates.monthly_totals().items():
+        emit({'month': month, **totals})
+    for series in agent.get_recurring_payments():
+        emit({'recurring': series['merchant'], 'cadence': series['cadence'],
+              'amount': series['expected_amount'], 'next_due': series['next_due']})
+    emit({'event': 'done', 'transactions': len(agent.df)})
+
+
+def cmd_detect_anomalies(agent, args):
+    unusual_df, explanation = agent.detect_unusual_transactions_async(args.method)
+    if unusual_df is not None:
+        emit_rows(unusual_df, ['date', 'description', 'amount', 'category', 'transaction_id'])
+    if args.explain:
+        emit({'explanation': explanation.result()})
+    emit({'event': 'done', 'unusual': 0 if unusual_df is None else len(unusual_df)})
+
+
+def cmd_budget_report(agent, args):
+    progress_df, narrative = agent.check_budget_progress_async()
+    if not progress_df.empty:
+        emit_rows(progress_df, ['category', 'goal', 'spent', 'percentage', 'status'])
+    if args.narrative:
+        emit({'narrative': narrative.result()})
+    emit({'event': 'done', 'budgets': len(progress_df)})
+
+
+def cmd_export(agent, args):
+    if args.output.endswith('.csv'):
+        df = agent.df
+        # Write in slices so progress can be reported on large histories
+        for start in range(0, max(len(df), 1), args.chunksize):
+            df.iloc[start:start + args.chunksize].to_csv(
+                args.output, mode='w' if start == 0 else 'a', header=start == 0, index=False
+            )
+            emit({'event': 'progress', 'rows': min(start + args.chunksize, len(df))})
+    else:
+        agent.export_excel(args.output)
+    emit({'event': 'done', 'output': args.output, 'rows': len(agent.df)})
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run FinanceAgent jobs without the Streamlit UI")
+    parser.add_argument('--data', default='transactions.xlsx', help="transactions file the store sits next to")
+    parser.add_argument('--memory', default='agent_memory.json', help="agent memory file")
+    parser.add_argument('--backend', choices=['gemini', 'stub'], help="LLM backend (default: $LLM_BACKEND or gemini)")
+    parser.add_argument('--rate-limit', type=float, help="model requests per second (default: $LLM_RATE_LIMIT or 4)")
+    parser.add_argument('--workers', type=int, default=1, help="concurrent categorization batches")
+    parser.add_argument('--metrics', help="write model call metrics to this file (.prom for Prometheus text, else JSON)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('import', help="stream a CSV/XLSX statement into the store")
+    command.add_argument('file')
+    command.add_argument('--chunksize', type=int, default=5000)
+    command.add_argument('--keep-duplicates', action='store_true', help="import rows already in the history")
+    command.add_argument('--skip-suspected', action='store_true',
+                         help="also skip rows matching an existing one within a few days")
+    command.set_defaults(run=cmd_import)
+
+    command = commands.add_parser('categorize', help="categorize transactions without a valid category")
+    command.add_argument('--category', help="re-run the AI on transactions currently in this category instead")
+    command.add_argument('--batch-size', type=int, default=25)
+    command.add_argument('--chunksize', type=int, default=1000)
+    command.set_defaults(run=cmd_categorize)
+
+    command = commands.add_parser('recompute-aggregates', help="compact the store and rebuild totals and recurring payments")
+    command.set_defaults(run=cmd_recompute_aggregates)
+
+    command = commands.add_parser('detect-anomalies', help="list unusual transactions")
+    command.add_argument('--method', choices=['zscore', 'robust', 'rolling'], default='zscore')
+    command.add_argument('--explain', action='store_true', help="add the AI explanation")
+    command.set_defaults(run=cmd_detect_anomalies)
+
+    command = commands.add_parser('budget-report', help="this month's spending against budget goals")
+    command.add_argument('--no-narrative', dest='narrative', action='store_false', help="skip the AI summary")
+    command.set_defaults(run=cmd_budget_report)
+
+    command = commands.add_parser('export', help="write all transactions to .xlsx or .csv")
+    command.add_argument('output')
+    command.add_argument('--chunksize', type=int, default=50000)
+    command.set_defaults(run=cmd_export)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.backend:
+        os.environ['LLM_BACKEND'] = args.backend
+    if args.rate_limit:
+        os.environ['LLM_RATE_LIMIT'] = str(args.rate_limit)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        from financeAgent import FinanceAgent
+
+        agent = FinanceAgent(file_path=args.data, memory_path=args.memory)
+        try:
+            args.run(agent, args)
+        finally:
+            if args.metrics:
+                with open(args.metrics, 'w') as f:
+                    f.write(agent.llm_metrics.to_prometheus() if args.metrics.endswith('.prom')
+                            else agent.llm_metrics.to_json())
+            agent.insight_worker.close()
+            agent.store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,16 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Shared pool for independent model calls; they spend their time waiting on the network
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='llm')
+
+
+def run_in_background(fn, *args, **kwargs):
+    """Run fn on the shared pool and return its Future"""
+    return _executor.submit(fn, *args, **kwargs)
+
+
+def completed(value):
+    """A Future that already holds value"""
+    future = Future()
+    future.set_result(value)
+    return future
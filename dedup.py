@@ -0,0 +1,93 @@
+import bisect
+from datetime import date
+import pandas as pd
+from category_cache import normalize_description
+
+NEW = 'new'
+DUPLICATE = 'duplicate'
+SUSPECTED = 'suspected'
+
+
+def transaction_keys(dates, amounts, descriptions):
+    """Duplicate-detection keys: 'YYYY-MM-DD|amount|normalized description'"""
+    days = pd.to_datetime(pd.Series(list(dates)), errors='coerce').dt.strftime('%Y-%m-%d').fillna('')
+    return [
+        f"{day}|{float(amount):.2f}|{normalize_description(description)}"
+        for day, amount, description in zip(days, amounts, descriptions)
+    ]
+
+
+class DuplicateIndex:
+    """Hash index of known transactions for skipping re-imported rows
+
+    Exact matches on (date, amount, normalized description) are found with a
+    dict lookup. Rows with the same amount and description a few days away
+    (posting-date drift between exports) are reported as suspected duplicates.
+    Both are matched one-to-one: each existing transaction accounts for at
+    most one incoming row, so genuinely repeated transactions (two identical
+    coffees on one day, the same coffee every morning) are only flagged as
+    many times as they already exist.
+    """
+
+    def __init__(self, window_days=3):
+        self.window_days = window_days
+        self.counts = {}
+        self.dates = {}
+
+    def build(self, keys):
+        self.counts = {}
+        self.dates = {}
+        self.add(keys)
+
+    def add(self, keys):
+        for key in keys:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            day, rest = key.split('|', 1)
+            if day:
+                bisect.insort(self.dates.setdefault(rest, []), date.fromisoformat(day).toordinal())
+
+    def classify(self, keys, window_days=None):
+        """Label each incoming key as new, duplicate or suspected"""
+        window_days = self.window_days if window_days is None else window_days
+        used = {}
+        labels = []
+        for key in keys:
+            if used.get(key, 0) < self.counts.get(key, 0):
+                used[key] = used.get(key, 0) + 1
+                labels.append(DUPLICATE)
+            else:
+                labels.append(NEW)
+        if not window_days:
+            return labels
+
+        # Suspects are matched against the existing transactions the exact
+        # matches left over, nearest day first, each used at most once
+        consumed = {}
+        for key, count in used.items():
+            day, rest = key.split('|', 1)
+            if day:
+                consumed.setdefault(rest, []).append((date.fromisoformat(day).toordinal(), count))
+        available = {}
+        for i, key in enumerate(keys):
+            day, rest = key.split('|', 1)
+            if labels[i] != NEW or not day or rest not in self.dates:
+                continue
+            if rest not in available:
+                available[rest] = self._unused_dates(rest, consumed.get(rest, []))
+            nearby = available[rest]
+            ordinal = date.fromisoformat(day).toordinal()
+            lo = bisect.bisect_left(nearby, ordinal - window_days)
+            hi = bisect.bisect_right(nearby, ordinal + window_days)
+            if lo < hi:
+                nearest = min(range(lo, hi), key=lambda j: abs(nearby[j] - ordinal))
+                del nearby[nearest]
+                labels[i] = SUSPECTED
+        return labels
+
+    def _unused_dates(self, rest, consumed):
+        """Sorted day ordinals of existing `rest` transactions minus the (ordinal, count) consumed"""
+        nearby = list(self.dates[rest])
+        for ordinal, count in consumed:
+            start = bisect.bisect_left(nearby, ordinal)
+            del nearby[start:start + count]
+        return nearby
@@ -0,0 +1,163 @@
+import zlib
+import numpy as np
+from category_cache import normalize_description
+
+
+class LSHIndex:
+    """Random-hyperplane LSH over unit vectors for approximate cosine search
+
+    Each of `n_tables` tables hashes a vector to the sign pattern of
+    `n_bits` random projections; vectors sharing a bucket in any table are
+    candidates and get ranked by exact cosine similarity.
+    """
+
+    def __init__(self, dim, n_tables=8, n_bits=10, seed=0):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((n_tables, n_bits, dim)).astype(np.float32)
+        self.weights = 1 << np.arange(n_bits, dtype=np.int64)
+        self.tables = [{} for _ in range(n_tables)]
+
+    def codes(self, vectors):
+        """Bucket code of each vector in each table, shape (len(vectors), n_tables)"""
+        bits = np.einsum('tbd,nd->ntb', self.planes, vectors) > 0
+        return bits @ self.weights
+
+    def add(self, vectors, start):
+        """Index vectors whose ids run from `start`"""
+        for offset, row in enumerate(self.codes(vectors)):
+            for table, code in zip(self.tables, row):
+                table.setdefault(int(code), []).append(start + offset)
+
+    def candidates(self, vector):
+        found = set()
+        for table, code in zip(self.tables, self.codes(vector[None, :])[0]):
+            found.update(table.get(int(code), ()))
+        return found
+
+
+class DescriptionEmbeddings:
+    """Offline embeddings of transaction descriptions with approximate nearest-neighbour search
+
+    Descriptions are normalized, split into character n-grams and hashed into
+    `dim` buckets with sublinear TF-IDF weighting, giving unit float32
+    vectors, so "UBER *TRIP 123" and "Uber rides" land close together. Only
+    distinct normalized descriptions are embedded; each keeps the row
+    positions it occurs at. IDF weights are refitted (and vectors
+    re-embedded) whenever the number of distinct descriptions doubles.
+    """
+
+    def __init__(self, dim=256, ngrams=(3, 4), n_tables=8, n_bits=10, seed=0):
+        self.dim = dim
+        self.ngrams = ngrams
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.seed = seed
+        self._buckets = {}
+        self.build([])
+
+    def features(self, description):
+        """Hashed n-gram bucket of every n-gram in the description"""
+        return self._features_of(normalize_description(description))
+
+    def _features_of(self, normalized):
+        text = f" {normalized} "
+        features = []
+        for n in self.ngrams:
+            for i in range(len(text) - n + 1):
+                gram = text[i:i + n]
+                bucket = self._buckets.get(gram)
+                if bucket is None:
+                    bucket = self._buckets[gram] = zlib.crc32(gram.encode('utf-8')) % self.dim
+                features.append(bucket)
+        return features
+
+    def _counts(self, feature_lists):
+        """(rows, dim) n-gram counts from per-row bucket lists"""
+        lengths = [len(features) for features in feature_lists]
+        rows = np.repeat(np.arange(len(feature_lists)), lengths)
+        cells = rows * self.dim + np.fromiter((f for features in feature_lists for f in features),
+                                              dtype=np.int64, count=sum(lengths))
+        counts = np.bincount(cells, minlength=len(feature_lists) * self.dim)
+        return counts.reshape(len(feature_lists), self.dim).astype(np.float32)
+
+    def _vectors(self, feature_lists):
+        vectors = np.log1p(self._counts(feature_lists)) * self.idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def embed(self, descriptions):
+        """Unit-length embeddings for arbitrary descriptions, shape (n, dim)"""
+        return self._vectors([self.features(description) for description in descriptions])
+
+    def build(self, descriptions):
+        self.keys = {}
+        self.positions = []
+        self._features = []
+        self.doc_freq = np.zeros(self.dim, dtype=np.int64)
+        self.idf = np.ones(self.dim, dtype=np.float32)
+        self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self._rows = 0
+        self.index = LSHIndex(self.dim, self.n_tables, self.n_bits, self.seed)
+        self.size = 0
+        self._fitted_on = 0
+        self.add(descriptions)
+
+    def add(self, descriptions):
+        """Index descriptions appended after the rows already indexed"""
+        new_features = []
+        for description in descriptions:
+            key = normalize_description(description)
+            if key not in self.keys:
+                self.keys[key] = len(self.positions)
+                self.positions.append([])
+                features = self._features_of(key)
+                self._features.append(features)
+                new_features.append(features)
+            self.positions[self.keys[key]].append(self.size)
+            self.size += 1
+
+        if not new_features:
+            return
+        self.doc_freq += (self._counts(new_features) > 0).sum(axis=0)
+        if len(self._features) >= 2 * max(self._fitted_on, 1):
+            self._refit()
+        else:
+            start = self._rows
+            vectors = self._vectors(new_features)
+            if start + len(vectors) > len(self._matrix):
+                # Grow geometrically so appends don't copy the whole matrix each time
+                grown = np.zeros((max(2 * len(self._matrix), start + len(vectors)), self.dim), dtype=np.float32)
+                grown[:start] = self._matrix[:start]
+                self._matrix = grown
+            self._matrix[start:start + len(vectors)] = vectors
+            self._rows = start + len(vectors)
+            self.index.add(vectors, start)
+
+    @property
+    def vectors(self):
+        """Embedding of each distinct description, shape (n, dim)"""
+        return self._matrix[:self._rows]
+
+    def _refit(self):
+        n = len(self._features)
+        self.idf = (np.log((1 + n) / (1 + self.doc_freq)) + 1).astype(np.float32)
+        self._matrix = self._vectors(self._features)
+        self._rows = len(self._matrix)
+        self.index = LSHIndex(self.dim, self.n_tables, self.n_bits, self.seed)
+        self.index.add(self.vectors, 0)
+        self._fitted_on = n
+
+    def search(self, description, limit=3, min_score=0.3):
+        """[(row position, similarity)] of the most similar distinct descriptions, latest occurrence each"""
+        if not len(self.vectors):
+            return []
+        query = self.embed([description])[0]
+        candidates = self.index.candidates(query)
+        if len(candidates) < limit:
+            # Too few bucket collisions: fall back to an exact scan
+            candidates = range(len(self.vectors))
+        candidates = np.fromiter(candidates, dtype=np.int64)
+        scores = self.vectors[candidates] @ query
+        order = np.argsort(-scores, kind='stable')[:limit]
+        return [(self.positions[candidates[i]][-1], float(scores[i]))
+                for i in order if scores[i] >= min_score]
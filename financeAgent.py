@@ -1,84 +1,347 @@
 import os
+import sys
 import pandas as pd
 import json
 import uuid
 import time
-import google.generativeai as genai
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from datetime import datetime, date as dt_date, timedelta
-import plotly.express as px
-import matplotlib.pyplot as plt
-import streamlit as st
+from transaction_store import open_store
+from category_cache import CategoryCache, cache_key
+from local_categorizer import LocalCategorizer
+from embeddings import DescriptionEmbeddings
+from aggregates import AggregateEngine
+from memory_store import MemoryStore, batched_memory_writes
+from background import DebouncedWorker
+from llm_cache import CachedModel
+from llm_client import create_client, LLMError
+from llm_metrics import LLMMetrics, InstrumentedModel
+from analysis_cache import AnalysisCache
+from quick_analysis import match_quick_analysis
+from concurrency import run_in_background, completed
+from anomaly import DETECTORS, OnlineCategoryStats
+from importer import iter_chunks, parse_chunk
+from recurring import RecurringDetector
+from frame_buffer import FrameBuffer
+from forecast import saving_plan, ESSENTIAL_CATEGORIES
+from dedup import DuplicateIndex, transaction_keys, NEW, SUSPECTED
 load_dotenv()
 
-GOOGLE_API_KEY = st.secrets.get("GOOGLE_API_KEY") or os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel('gemini-2.0-flash')
+MODEL_NAME = 'gemini-2.0-flash'
+
+_default_model = None
+_default_model_lock = threading.Lock()
+
+
+def google_api_key():
+    """API key from Streamlit secrets when running in the app, otherwise from the environment"""
+    # Only consult Streamlit if the UI already loaded it; headless use never imports it
+    if 'streamlit' in sys.modules:
+        try:
+            key = sys.modules['streamlit'].secrets.get("GOOGLE_API_KEY")
+            if key:
+                return key
+        except Exception:
+            pass  # no secrets file
+    return os.getenv("GOOGLE_API_KEY")
+
+
+def default_model():
+    """Shared cached, rate-limited model client for the backend named by $LLM_BACKEND"""
+    global _default_model
+    with _default_model_lock:
+        if _default_model is None:
+            client = create_client(MODEL_NAME, google_api_key())
+            _default_model = CachedModel(client, client.backend.name)
+        return _default_model
+
+# Shown in place of a reply when the model can't be reached
+MODEL_UNAVAILABLE = "The AI service is unavailable right now. Please try again in a moment."
+
+CATEGORIES = ['Food', 'Transportation', 'Housing', 'Entertainment', 'Shopping', 'Utilities',
+              'Healthcare', 'Education', 'Travel', 'Income', 'Other']
 
 class FinanceAgent:
-    def __init__(self, file_path='transactions.xlsx', memory_path='agent_memory.json'):
+    def __init__(self, file_path='transactions.xlsx', memory_path='agent_memory.json', store=None, model=None):
         # Set up data storage
         self.file_path = file_path
         self.memory_path = memory_path
-        
-        # Load transaction data
-        if os.path.exists(file_path):
-            self.df = pd.read_excel(file_path)
-        else:
-            self.df = pd.DataFrame(columns=['date', 'amount', 'description', 'category', 'transaction_id'])
-            self.df.to_excel(file_path, index=False)
 
-        # Ensure date is datetime and each transaction has an ID
-        self.df['date'] = pd.to_datetime(self.df['date'], errors='coerce')
-        if 'transaction_id' not in self.df.columns:
-            self.df['transaction_id'] = [str(uuid.uuid4()) for _ in range(len(self.df))]
-            self.df.to_excel(file_path, index=False)
-        
-        # Load agent memory
+        # Every model call goes through this client (see llm_client.py) and is
+        # recorded per calling method (see llm_metrics.py). Prices are per
+        # million tokens, for the cost estimates.
+        self.llm_metrics = LLMMetrics(
+            input_price=float(os.getenv('LLM_INPUT_PRICE', '0')),
+            output_price=float(os.getenv('LLM_OUTPUT_PRICE', '0'))
+        )
+        self.model = InstrumentedModel(model or default_model(), self.llm_metrics)
+
+        # Transactions live in an append-only SQLite store next to the Excel file.
+        # The Excel file is imported once and can be re-exported with export_excel().
+        if store is None:
+            store = open_store(os.path.splitext(file_path)[0] + '.db')
+            if store.count() == 0 and os.path.exists(file_path):
+                store.import_excel(file_path)
+        self.store = store
+
+        # Load transaction data; appended rows are buffered and merged on next
+        # read into a FrameBuffer, created on the first append
+        self._df = self.store.load()
+        self._pending_rows = []
+        self._buffer = None
+        self._df_lock = threading.RLock()
+
+        # Bumped on every change to the transactions / the memory, so callers
+        # (e.g. the UI's caches) can tell when derived results are stale
+        self.data_version = 0
+        self.memory_version = 0
+        self._embeddings = None
+        self._aggregates = None
+        self._category_stats = None
+        self._recurring = None
+        self._duplicate_index = None
+        # Keys of rows added by a file import still in progress; see import_file
+        self._import_keys = None
+        self.duplicate_window_days = 3
+
+        # Remembered categories for recurring merchants
+        self.category_cache = CategoryCache(
+            os.path.join(os.path.dirname(memory_path), 'category_cache.json')
+        )
+
+        # Validated analysis code for repeated queries
+        self.analysis_cache = AnalysisCache(
+            os.path.join(os.path.dirname(memory_path), 'analysis_cache.json')
+        )
+
+        # Offline categorizer trained on the labeled history on first use
+        self.local_categorizer = LocalCategorizer()
+        self._local_categorizer_trained = False
+
+        # Load agent memory (snapshot plus write-behind journal)
+        self.memory_store = MemoryStore(memory_path)
         self.memory = self._load_memory()
-        
-        # Chat history for conversational context
-        if 'chat_history' not in self.memory:
-            self.memory['chat_history'] = []
-            
-        # User preferences and insights
-        if 'user_preferences' not in self.memory:
-            self.memory['user_preferences'] = {
-                'budget_goals': {},
-                'saving_targets': {},
-                'categories_to_watch': []
-            }
-            
-        # Agent insights and observations
-        if 'agent_insights' not in self.memory:
-            self.memory['agent_insights'] = []
-            
-        # Save initialized memory
-        self._save_memory()
+
+        with self.memory_store.batch():
+            # Category totals now come from the aggregate engine
+            if self.memory.pop('category_trends', None) is not None:
+                self._save_memory('category_trends')
+
+            # Chat history for conversational context
+            if 'chat_history' not in self.memory:
+                self.memory['chat_history'] = []
+                self._save_memory('chat_history')
+
+            # User preferences and insights
+            if 'user_preferences' not in self.memory:
+                self.memory['user_preferences'] = {
+                    'budget_goals': {},
+                    'saving_targets': {},
+                    'categories_to_watch': []
+                }
+                self._save_memory('user_preferences')
+
+            # Agent insights and observations
+            if 'agent_insights' not in self.memory:
+                self.memory['agent_insights'] = []
+                self._save_memory('agent_insights')
+
+        # Insights are regenerated in the background once a burst of new transactions settles
+        self.insight_worker = DebouncedWorker(self._generate_new_insights, debounce=2.0, name='insight-worker')
         
         print("Finance Agent initialized with data and memory")
 
+    @property
+    def df(self):
+        """All transactions, including rows appended since the last read"""
+        with self._df_lock:
+            if self._pending_rows:
+                # Written into spare capacity rather than concatenated, so a
+                # read after an add doesn't copy the whole history
+                if self._buffer is None:
+                    self._buffer = FrameBuffer(self._df)
+                for rows in self._pending_rows:
+                    self._buffer.append(rows)
+                self._pending_rows = []
+                self._df = self._buffer.frame()
+            return self._df
+
+    @df.setter
+    def df(self, value):
+        self._df = value
+        self._pending_rows = []
+        self._buffer = None
+        self.data_version += 1
+        self._embeddings = None
+        self._aggregates = None
+        self._category_stats = None
+        self._recurring = None
+
+    def _set_categories(self, index, categories):
+        """Change the category of the rows of df at the given index labels"""
+        with self._df_lock:
+            df = self.df
+            if self._buffer is None:
+                df.loc[index, 'category'] = categories
+                return
+            self._buffer.set_values(df.index.get_indexer(index), 'category', categories)
+            self._df = self._buffer.frame()
+
+    def _append_rows(self, rows):
+        """Persist new rows to the store and queue them for the in-memory frame"""
+        self.store.append(rows)
+        with self._df_lock:
+            self._pending_rows.append(rows)
+            self.data_version += 1
+        if self._embeddings is not None:
+            self._embeddings.add(rows['description'])
+        if self._aggregates is not None:
+            self._aggregates.add_rows(rows)
+        if self._recurring is not None:
+            self._recurring.update(rows)
+            self._remember_recurring()
+        keys = transaction_keys(rows['date'], rows['amount'], rows['description'])
+        if self._import_keys is not None:
+            self._import_keys.extend(keys)
+        elif self._duplicate_index is not None:
+            self._duplicate_index.add(keys)
+
+    @property
+    def duplicate_index(self):
+        """Keys of known transactions for skipping re-imports, loaded from the store on first use"""
+        if self._duplicate_index is None:
+            self._duplicate_index = DuplicateIndex(self.duplicate_window_days)
+            self._duplicate_index.build(self.store.dedup_keys())
+        return self._duplicate_index
+
+    def filter_new_transactions(self, rows, window_days=None, skip_suspected=False):
+        """Drop rows already in the history; returns (new rows, summary counts)
+
+        Exact matches on date, amount and normalized description are skipped.
+        Rows matching on amount and description within `window_days` are
+        suspected duplicates: they are kept and counted unless skip_suspected
+        is True.
+        """
+        keys = transaction_keys(rows['date'], rows['amount'], rows['description'])
+        labels = pd.Series(self.duplicate_index.classify(keys, window_days), index=rows.index)
+        keep = (labels == NEW) | ((labels == SUSPECTED) & (not skip_suspected))
+        summary = {
+            'new': int((labels == NEW).sum()),
+            'skipped': int((~keep).sum()),
+            'suspected': int((labels == SUSPECTED).sum())
+        }
+        return rows[keep], summary
+
+    @property
+    def category_stats(self):
+        """Running per-category statistics for flagging new transactions, built on first use"""
+        if self._category_stats is None:
+            self._category_stats = OnlineCategoryStats()
+            self._category_stats.build(self.df)
+        return self._category_stats
+
+    @property
+    def aggregates(self):
+        """Materialized totals per month, category and sign, built on first use"""
+        if self._aggregates is None:
+            self._aggregates = AggregateEngine()
+            self._aggregates.build(self.df)
+        return self._aggregates
+
+    @property
+    def recurring(self):
+        """Recurring payment detector, built on first use; appends keep it current afterwards"""
+        if self._recurring is None:
+            detector = RecurringDetector()
+            detector.build(self.df)
+            self._recurring = detector
+            self._remember_recurring()
+        return self._recurring
+
+    def get_recurring_payments(self):
+        """Active recurring payments and income: cadence, expected amount and next due date"""
+        return self.recurring.active()
+
+    def _remember_recurring(self, limit=50):
+        """Keep the active recurring series in memory for context across sessions"""
+        series = [{k: v for k, v in s.items() if k != 'key'} for s in self.recurring.active()[:limit]]
+        if series != self.memory.get('recurring_payments'):
+            self.memory['recurring_payments'] = series
+            self._save_memory('recurring_payments')
+
+    def export_excel(self, target=None):
+        """Export all transactions to the Excel format (defaults to file_path)"""
+        self.store.export_excel(target or self.file_path)
+
     def _load_memory(self):
-        """Load agent memory from JSON file"""
-        if os.path.exists(self.memory_path):
-            with open(self.memory_path, 'r') as f:
-                return json.load(f)
-        return {}
+        """Load agent memory from the JSON snapshot and journal"""
+        return self.memory_store.load()
         
-    def _save_memory(self):
-        """Save agent memory to JSON file"""
-        with open(self.memory_path, 'w') as f:
-            json.dump(self.memory, f)
+    def _save_memory(self, *keys):
+        """Mark memory keys as changed; writes are coalesced per agent call"""
+        self.memory_version += 1
+        self.memory_store.mark(*keys)
 
     def categorize_transaction(self, description, amount):
+        """Categorize a transaction: cache first, then the local model, then AI"""
+        return self._categorize(description, amount)[0]
+
+    def _categorize(self, description, amount):
+        """(category, confirmed); confirmed is False for an offline guess, which must not be learned"""
+        category = self.category_cache.get(description, amount)
+        if category is not None:
+            return category, True
+
+        category = self._categorize_locally(description, amount)
+        if category is not None:
+            return category, True
+
+        try:
+            category = self._categorize_with_llm(description, amount)
+        except LLMError as e:
+            # Offline: take the local model's best guess even if it's unsure
+            print(f"Error categorizing transaction with AI: {e}")
+            return self._local_guess(description, amount), False
+
+        if category in CATEGORIES:
+            self.category_cache.put(description, amount, category)
+            self.category_cache.save()
+        return category, category in CATEGORIES
+
+    def _local_guess(self, description, amount):
+        """The local model's best guess however unsure, for when the AI can't be reached"""
+        guess, _ = self.local_categorizer.predict(description, amount)
+        return guess or 'Other'
+
+    def _train_local_categorizer(self):
+        """Train the offline categorizer on the labeled history (once per session)"""
+        if self._local_categorizer_trained:
+            return
+        labeled = self.df[self.df['category'].isin(CATEGORIES)]
+        self.local_categorizer.fit(labeled['description'], labeled['amount'], labeled['category'])
+        self._local_categorizer_trained = True
+
+    def _learn_categories(self, descriptions, amounts, categories, weight=1):
+        """Incrementally update the offline categorizer with labeled rows"""
+        if self._local_categorizer_trained:
+            self.local_categorizer.partial_fit(descriptions, amounts, categories, weight=weight)
+
+    def _categorize_locally(self, description, amount):
+        """Confident local prediction, or None to defer to the AI"""
+        self._train_local_categorizer()
+        return self.local_categorizer.predict_confident(description, amount)
+
+    def _categorize_with_llm(self, description, amount):
         """Categorize a transaction using AI"""
         # Include past categories to help with consistency
-        recent_similar = self._find_similar_transactions(description)
+        recent_similar = self.find_similar_transactions(description)
         similar_examples = "\n".join([f"Description: {row['description']}, Amount: ${row['amount']}, Category: {row['category']}" 
                                  for _, row in recent_similar.iterrows()])
         
         prompt = f"""
-        Categorize this transaction into one of these categories: Food, Transportation, Housing, Entertainment, Shopping, Utilities, Healthcare, Education, Travel, Income, Other
+        Categorize this transaction into one of these categories: {', '.join(CATEGORIES)}
         
         Transaction: {description}
         Amount: ${amount}
@@ -88,26 +351,224 @@ class FinanceAgent:
         
         Return only the category name without any explanation.
         """
-        response = model.generate_content(prompt)
+        response = self.model.generate_content(prompt)
         category = response.text.strip()
         return category
 
-    def _find_similar_transactions(self, description, limit=3):
-        """Find similar transactions in history"""
+    def categorize_transactions(self, transactions, batch_size=25, workers=1, fresh=False):
+        """Categorize many transactions using one AI call per batch
+
+        With `workers` > 1 the batches are categorized concurrently. `fresh`
+        skips the category cache and local model and always asks the AI.
+        """
+        return self._categorize_many(transactions, batch_size, workers, fresh)[0]
+
+    def _categorize_many(self, transactions, batch_size=25, workers=1, fresh=False):
+        """(categories, confirmed) for categorize_transactions; see _categorize_batch"""
+        batches = [transactions.iloc[start:start + batch_size]
+                   for start in range(0, len(transactions), batch_size)]
+        if workers <= 1 or len(batches) <= 1:
+            results = [self._categorize_batch(batch, fresh) for batch in batches]
+        else:
+            # Build the lazily created models up front so the threads don't race to build them
+            self._train_local_categorizer()
+            if not self.df.empty:
+                self.embeddings
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='categorize') as executor:
+                results = list(executor.map(lambda batch: self._categorize_batch(batch, fresh), batches))
+        return ([category for categories, _ in results for category in categories],
+                [flag for _, confirmed in results for flag in confirmed])
+
+    def _categorize_batch(self, batch, fresh=False):
+        """Categorize a batch of transactions, sending only uncached merchants to the AI
+
+        Returns (categories, confirmed). Rows the AI couldn't answer get a
+        fallback category with confirmed False; those are neither cached nor
+        learned, so an outage doesn't stick.
+        """
+        descriptions = batch['description'].tolist()
+        amounts = batch['amount'].tolist()
+        if fresh:
+            categories = [None] * len(batch)
+        else:
+            categories = [self.category_cache.get(desc, amt) or self._categorize_locally(desc, amt)
+                          for desc, amt in zip(descriptions, amounts)]
+        confirmed = [category is not None for category in categories]
+
+        # One prompt slot per distinct uncached merchant
+        pending = {}
+        for i, category in enumerate(categories):
+            if category is None:
+                pending.setdefault(cache_key(descriptions[i], amounts[i]), []).append(i)
+        if not pending:
+            return categories, confirmed
+
+        slots = [rows[0] for rows in pending.values()]
+        parsed, offline = self._categorize_batch_with_llm(
+            [descriptions[i] for i in slots], [amounts[i] for i in slots]
+        )
+
+        # Ask one by one only for rows a reply left out; if the AI can't be
+        # reached at all, take the local model's best guess like categorize_transaction
+        for slot, rows in enumerate(pending.values()):
+            description, amount = descriptions[rows[0]], amounts[rows[0]]
+            category = parsed.get(slot)
+            answered = category is not None
+            if not answered and not offline:
+                try:
+                    category = self._categorize_with_llm(description, amount)
+                    answered = True
+                except LLMError as e:
+                    print(f"Error categorizing transaction with AI: {e}")
+                    offline = True
+            if category is None:
+                category = self._local_guess(description, amount)
+            answered = answered and category in CATEGORIES
+            if answered:
+                self.category_cache.put(description, amount, category)
+            for i in rows:
+                categories[i] = category
+                confirmed[i] = answered
+
+        self.category_cache.save()
+        return categories, confirmed
+
+    def _categorize_batch_with_llm(self, descriptions, amounts):
+        """Ask the AI for categories of many transactions in one JSON reply
+
+        Returns (categories by id, failed). `failed` means no reply came back
+        at all; a reply that only partly parsed returns what it could.
+        """
+        # Pool a few similar past transactions for the whole batch to keep categories consistent
+        examples = {}
+        for description in descriptions:
+            for _, row in self.find_similar_transactions(description, limit=1).iterrows():
+                examples[row['description']] = (row['amount'], row['category'])
+            if len(examples) >= 20:
+                break
+        similar_examples = "\n".join([f"Description: {desc}, Amount: ${amt}, Category: {cat}"
+                                      for desc, (amt, cat) in examples.items()])
+        items = "\n".join([f"{i}. Transaction: {desc} | Amount: ${amt}"
+                           for i, (desc, amt) in enumerate(zip(descriptions, amounts))])
+
+        prompt = f"""
+        Categorize each of these transactions into one of these categories: {', '.join(CATEGORIES)}
+
+        Transactions:
+        {items}
+
+        Examples of similar past transactions:
+        {similar_examples if examples else "No similar transactions found."}
+
+        Return ONLY a JSON array with one object per transaction, e.g. [{{"id": 0, "category": "Food"}}].
+        Do not include any explanation or markdown.
+        """
+
+        try:
+            response = self.model.generate_content(prompt)
+        except LLMError as e:
+            print(f"Error categorizing batch with AI: {e}")
+            return {}, True
+
+        parsed = {}
+        try:
+            reply = response.text.strip()
+            if reply.startswith("```"):
+                reply = reply.strip("`")
+                if reply.startswith("json"):
+                    reply = reply[4:]
+            for item in json.loads(reply):
+                category = str(item.get('category', '')).strip()
+                if category in CATEGORIES:
+                    parsed[int(item['id'])] = category
+        except Exception as e:
+            print(f"Error parsing batch categorization: {e}")
+        return parsed, False
+
+    @batched_memory_writes
+    def recategorize_transaction(self, transaction_id, category):
+        """Change the category of an existing transaction"""
+        rows = self.df.index[self.df['transaction_id'] == transaction_id]
+        if len(rows) == 0:
+            return False
+
+        row = self.df.loc[rows[0]]
+        self.store.update_category(transaction_id, category)
+        self._set_categories(rows, category)
+        self.data_version += 1
+        if self._aggregates is not None:
+            self._aggregates.add(row['date'], row['amount'], row['category'], weight=-1)
+            self._aggregates.add(row['date'], row['amount'], category)
+        if self._category_stats is not None:
+            self._category_stats.update(row['category'], row['amount'], weight=-1)
+            self._category_stats.update(category, row['amount'])
+        self._learn_categories([row['description']], [row['amount']], [row['category']], weight=-1)
+        self._learn_categories([row['description']], [row['amount']], [category])
+
+        # The user's choice replaces whatever was cached for this merchant
+        self.category_cache.invalidate(row['description'], row['amount'])
+        self.category_cache.put(row['description'], row['amount'], category)
+        self.category_cache.save()
+
+        for recent in self.memory.get('recent_transactions', []):
+            if recent['transaction_id'] == transaction_id:
+                recent['category'] = category
+        self._save_memory('recent_transactions')
+        return True
+
+    @batched_memory_writes
+    def recategorize_transactions(self, updates):
+        """Change many categories at once from a {transaction_id: category} dict; returns how many changed
+
+        Meant for batch re-categorization, so unlike recategorize_transaction
+        the choices are not pinned in the category cache.
+        """
+        df = self.df
+        current = df['category'].where(df['transaction_id'].isin(updates))
+        new = df['transaction_id'].map(updates)
+        changed = df[new.notna() & (new != current)]
+        if changed.empty:
+            return 0
+
+        new = new[changed.index]
+        self.store.update_categories(dict(zip(changed['transaction_id'], new)))
+        self._set_categories(changed.index, new.to_numpy())
+        self.data_version += 1
+        for row, category in zip(changed.itertuples(index=False), new):
+            if self._aggregates is not None:
+                self._aggregates.add(row.date, row.amount, row.category, weight=-1)
+                self._aggregates.add(row.date, row.amount, category)
+            if self._category_stats is not None:
+                self._category_stats.update(row.category, row.amount, weight=-1)
+                self._category_stats.update(category, row.amount)
+        self._learn_categories(changed['description'], changed['amount'], changed['category'], weight=-1)
+        self._learn_categories(changed['description'], changed['amount'], new)
+
+        for recent in self.memory.get('recent_transactions', []):
+            if recent['transaction_id'] in updates:
+                recent['category'] = updates[recent['transaction_id']]
+        self._save_memory('recent_transactions')
+        return len(changed)
+
+    @property
+    def embeddings(self):
+        """Description embeddings and ANN index, built on first use; appends keep it current afterwards"""
+        if self._embeddings is None:
+            embeddings = DescriptionEmbeddings()
+            embeddings.build(self.df['description'])
+            self._embeddings = embeddings
+        return self._embeddings
+
+    def find_similar_transactions(self, description, limit=3, min_score=0.3):
+        """Past transactions with the most similar descriptions, with a `similarity` column"""
         if self.df.empty:
             return pd.DataFrame()
-            
-        # This is a simple implementation. For production, consider using embeddings or better similarity metrics
-        description_lower = description.lower()
-        
-        # Find transactions containing similar words
-        words = set(description_lower.split())
-        mask = self.df['description'].str.lower().apply(
-            lambda x: any(word in str(x).lower() for word in words if len(word) > 3)
-        )
-        
-        return self.df[mask].tail(limit)
 
+        matches = self.embeddings.search(description, limit, min_score)
+        similar = self.df.iloc[[position for position, _ in matches]]
+        return similar.assign(similarity=[score for _, score in matches])
+
+    @batched_memory_writes
     def add_transaction(self, date, amount, description):
         """Add a new transaction with AI categorization"""
         if isinstance(date, str):
@@ -119,29 +580,150 @@ class FinanceAgent:
         transaction_id = str(uuid.uuid4())
         
         # Categorize using AI
-        category = self.categorize_transaction(description, amount)
+        category, confirmed = self._categorize(description, amount)
         
         new_row = pd.DataFrame({
-            'date': [date],
+            'date': [pd.Timestamp(date)],
             'amount': [float(amount)],
             'description': [description],
             'category': [category],
             'transaction_id': [transaction_id]
         })
 
-        self.df = pd.concat([self.df, new_row], ignore_index=True)
-        self.df['date'] = pd.to_datetime(self.df['date'], errors='coerce')
-        self.df.to_excel(self.file_path, index=False)
+        # Flag it against the category's history before it joins that history
+        self._flag_if_unusual(date, amount, description, category, transaction_id)
+        self.category_stats.update(category, amount)
+
+        self._append_rows(new_row)
+        if confirmed:
+            self._learn_categories([description], [amount], [category])
 
         # Update agent memory with this transaction
         self._update_memory_with_transaction(date, amount, description, category, transaction_id)
         
-        # Generate insights asynchronously (in a real app, this would be a background task)
-        self._generate_new_insights()
+        # Generate insights in the background so the caller doesn't wait on a second AI call
+        self.insight_worker.notify()
 
         return category, transaction_id
 
-    def _update_memory_with_transaction(self, date, amount, description, category, transaction_id):
+    @batched_memory_writes
+    def add_transactions(self, transactions, batch_size=25, skip_duplicates=True, skip_suspected=False, workers=1):
+        """Add many transactions at once with batched AI categorization
+
+        `transactions` is a DataFrame with date, amount and description columns.
+        Rows with an unparseable date or amount are skipped, as are rows already
+        in the history unless skip_duplicates is False. With `workers` > 1 all
+        batches are categorized concurrently up front. Returns the added rows,
+        with the duplicate summary in `.attrs['import_summary']`.
+        """
+        new_rows = pd.DataFrame({
+            'date': pd.to_datetime(transactions['date'], errors='coerce'),
+            'amount': pd.to_numeric(transactions['amount'], errors='coerce'),
+            'description': transactions['description'].astype(str)
+        }).dropna(subset=['date', 'amount']).reset_index(drop=True)
+
+        # Only genuinely new rows go on to categorization
+        summary = {'new': len(new_rows), 'skipped': 0, 'suspected': 0}
+        if skip_duplicates and not new_rows.empty:
+            new_rows, summary = self.filter_new_transactions(new_rows, skip_suspected=skip_suspected)
+            new_rows = new_rows.reset_index(drop=True)
+
+        categories = None
+        if workers > 1:
+            categories, confirmed = self._categorize_many(new_rows, batch_size, workers)
+
+        added = []
+        for start in range(0, len(new_rows), batch_size):
+            batch = new_rows.iloc[start:start + batch_size].copy()
+            if categories is not None:
+                batch['category'] = categories[start:start + batch_size]
+                batch_confirmed = confirmed[start:start + batch_size]
+            else:
+                batch['category'], batch_confirmed = self._categorize_batch(batch)
+            batch['transaction_id'] = [str(uuid.uuid4()) for _ in range(len(batch))]
+            for row in batch.itertuples(index=False):
+                self._flag_if_unusual(row.date, row.amount, row.description, row.category, row.transaction_id)
+                self.category_stats.update(row.category, row.amount)
+
+            # Persist once per batch instead of once per row
+            self._append_rows(batch)
+            # Offline fallbacks aren't learned; the AI gets another chance at them later
+            learned = batch[batch_confirmed]
+            self._learn_categories(learned['description'], learned['amount'], learned['category'])
+
+            for row in batch.itertuples(index=False):
+                self._update_memory_with_transaction(
+                    row.date, row.amount, row.description, row.category, row.transaction_id, save=False
+                )
+            self._save_memory('recent_transactions')
+            added.append(batch)
+
+        if not added:
+            result = new_rows.assign(category=pd.Series(dtype=str), transaction_id=pd.Series(dtype=str))
+            result.attrs['import_summary'] = summary
+            return result
+
+        # Generate insights once for the whole import, in the background
+        self.insight_worker.notify()
+
+        result = pd.concat(added, ignore_index=True)
+        result.attrs['import_summary'] = summary
+        return result
+
+    def import_file(self, source, name, chunksize=5000, progress=None, skip_duplicates=True,
+                    skip_suspected=False, workers=1):
+        """Stream a CSV/XLSX statement into the store chunk by chunk
+
+        Each chunk is validated and parsed vectorized, categorized and persisted
+        before the next is read, so memory use stays bounded by `chunksize`.
+        `progress(fraction, summary)` is called after every chunk.
+
+        Every chunk is checked for duplicates against the history as it was
+        when the import started; rows of the file only join the duplicate
+        index once it is done, so the result doesn't depend on `chunksize`.
+        """
+        summary = {'imported': 0, 'invalid': 0, 'skipped': 0, 'suspected': 0}
+        self._import_keys = []
+        try:
+            for chunk, fraction in iter_chunks(source, name, chunksize):
+                parsed, invalid = parse_chunk(chunk)
+                summary['invalid'] += invalid
+                if not parsed.empty:
+                    added = self.add_transactions(parsed, skip_duplicates=skip_duplicates,
+                                                  skip_suspected=skip_suspected, workers=workers)
+                    summary['imported'] += len(added)
+                    summary['skipped'] += added.attrs['import_summary']['skipped']
+                    summary['suspected'] += added.attrs['import_summary']['suspected']
+                if progress is not None:
+                    progress(fraction, summary)
+        finally:
+            keys, self._import_keys = self._import_keys, None
+            if self._duplicate_index is not None:
+                self._duplicate_index.add(keys)
+        return summary
+
+    def _flag_if_unusual(self, date, amount, description, category, transaction_id, threshold=2.0):
+        """Record an alert when a new transaction is far above its category's running mean"""
+        z_score = self.category_stats.zscore(category, amount)
+        if z_score is None or z_score <= threshold:
+            return False
+
+        alerts = self.memory.setdefault('unusual_alerts', [])
+        alerts.append({
+            'date': pd.Timestamp(date).strftime('%Y-%m-%d'),
+            'amount': float(amount),
+            'description': description,
+            'category': category,
+            'transaction_id': transaction_id,
+            'z_score': round(z_score, 2)
+        })
+        # Keep only the latest 20 alerts
+        if len(alerts) > 20:
+            self.memory['unusual_alerts'] = alerts[-20:]
+        self._save_memory('unusual_alerts')
+        return True
+
+    def _update_memory_with_transaction(self, date, amount, description, category, transaction_id, save=True):
         """Update agent memory with new transaction details"""
         if 'recent_transactions' not in self.memory:
             self.memory['recent_transactions'] = []
@@ -159,26 +741,9 @@ class FinanceAgent:
         if len(self.memory['recent_transactions']) > 20:
             self.memory['recent_transactions'] = self.memory['recent_transactions'][-20:]
             
-        # Update category spending trends
-        if 'category_trends' not in self.memory:
-            self.memory['category_trends'] = {}
-            
-        if category not in self.memory['category_trends']:
-            self.memory['category_trends'][category] = {
-                'count': 0,
-                'total': 0,
-                'average': 0
-            }
-            
-        self.memory['category_trends'][category]['count'] += 1
-        self.memory['category_trends'][category]['total'] += float(amount)
-        self.memory['category_trends'][category]['average'] = (
-            self.memory['category_trends'][category]['total'] / 
-            self.memory['category_trends'][category]['count']
-        )
-        
         # Save updated memory
-        self._save_memory()
+        if save:
+            self._save_memory('recent_transactions')
 
     def _generate_new_insights(self):
         """Generate new insights based on latest transactions"""
@@ -212,19 +777,21 @@ class FinanceAgent:
         """
         
         try:
-            response = model.generate_content(prompt)
+            response = self.model.generate_content(prompt)
             new_insight = response.text.strip()
             
             # Only add if we have a valid insight
             if len(new_insight) > 10:
-                self.memory['agent_insights'].append(new_insight)
-                # Keep only latest 10 insights
-                if len(self.memory['agent_insights']) > 10:
-                    self.memory['agent_insights'] = self.memory['agent_insights'][-10:]
-                self._save_memory()
+                with self.memory_store.lock:
+                    self.memory['agent_insights'].append(new_insight)
+                    # Keep only latest 10 insights
+                    if len(self.memory['agent_insights']) > 10:
+                        self.memory['agent_insights'] = self.memory['agent_insights'][-10:]
+                self._save_memory('agent_insights')
         except Exception as e:
             print(f"Error generating insights: {e}")
 
+    @batched_memory_writes
     def analyze_data(self, query):
         """Analyze financial data based on natural language query"""
         # Add recent queries to memory for context
@@ -240,10 +807,32 @@ class FinanceAgent:
         if len(self.memory['recent_queries']) > 10:
             self.memory['recent_queries'] = self.memory['recent_queries'][-10:]
             
-        self._save_memory()
+        self._save_memory('recent_queries')
         
         # Add the user's query to chat history
         self.add_to_chat_history('user', query)
+
+        # Common analyses have native implementations that need no AI
+        quick = match_quick_analysis(query)
+        if quick is not None:
+            try:
+                result, fig, analysis_code = quick.run(self.df, query)
+                self.add_to_chat_history('agent', result)
+                return result, fig, analysis_code
+            except Exception as e:
+                print(f"Error in built-in analysis, falling back to AI: {e}")
+
+        # Re-run previously validated code for the same query and schema without asking the AI
+        cached = self.analysis_cache.get(query, self.df)
+        if cached is not None:
+            analysis_code, compiled = cached
+            try:
+                result, fig = self._run_analysis(compiled)
+                self.add_to_chat_history('agent', result)
+                return result, fig, analysis_code
+            except Exception as e:
+                print(f"Cached analysis failed, regenerating: {e}")
+                self.analysis_cache.invalidate(query, self.df)
         
         # Generate code for analysis with contextual understanding
         prompt = f"""
@@ -273,7 +862,7 @@ class FinanceAgent:
         8. Handle edge cases like empty DataFrames gracefully.
 
         This is the code I'm using from your response:
-        response = model.generate_content(prompt)
+        response = self.model.generate_content(prompt)
         analysis_code = response.text.strip()
 
         if analysis_code.startswith("```python"):
@@ -296,19 +885,22 @@ class FinanceAgent:
             self.add_to_chat_history('agent', error_message)
             return error_message, None, analysis_code
         """
-        response = model.generate_content(prompt)
-        analysis_code = response.text.strip()
+        try:
+            analysis_code = self.model.generate_content(prompt).text.strip()
+        except LLMError as e:
+            error_message = f"Error during analysis: {e}"
+            self.add_to_chat_history('agent', error_message)
+            return error_message, None, None
 
         if analysis_code.startswith("```python"):
             analysis_code = analysis_code.split("```python")[1]
         if analysis_code.endswith("```"):
             analysis_code = analysis_code.split("```")[0]
 
-        local_vars = {'df': self.df.copy(), 'px': px, 'pd': pd, 'plt': plt, 'datetime': datetime}
         try:
-            exec(analysis_code, {}, local_vars)
-            result = local_vars.get('result', "No insights were generated.")
-            fig = local_vars.get('fig', None)
+            compiled = compile(analysis_code, '<analysis>', 'exec')
+            result, fig = self._run_analysis(compiled)
+            self.analysis_cache.put(query, self.df, analysis_code, compiled)
             
             # Add the result to chat history
             self.add_to_chat_history('agent', result)
@@ -319,6 +911,15 @@ class FinanceAgent:
             self.add_to_chat_history('agent', error_message)
             return error_message, None, analysis_code
 
+    def _run_analysis(self, compiled):
+        """Execute analysis code against a copy of the data and return (result, fig)"""
+        # Plotting libraries are slow to import, so only load them for generated code
+        import plotly.express as px
+        import matplotlib.pyplot as plt
+        local_vars = {'df': self.df.copy(), 'px': px, 'pd': pd, 'plt': plt, 'datetime': datetime}
+        exec(compiled, {}, local_vars)
+        return local_vars.get('result', "No insights were generated."), local_vars.get('fig', None)
+
     def add_to_chat_history(self, speaker, message):
         """Add message to chat history"""
         self.memory['chat_history'].append({
@@ -331,20 +932,19 @@ class FinanceAgent:
         if len(self.memory['chat_history']) > 50:
             self.memory['chat_history'] = self.memory['chat_history'][-50:]
             
-        self._save_memory()
+        self._save_memory('chat_history')
 
+    @batched_memory_writes
     def get_budget_recommendation(self):
         """Generate a personalized budget recommendation"""
         # Get monthly income
-        monthly_income = self.df[self.df['amount'] > 0]['amount'].sum()
+        monthly_income = self.aggregates.income()
         
         # Get monthly expenses by category
-        expenses = self.df[self.df['amount'] < 0].copy()
-        expenses['amount'] = expenses['amount'].abs()  # Convert to positive for readability
-        monthly_expenses = expenses.groupby('category')['amount'].sum().reset_index()
+        monthly_expenses = self.aggregates.expenses_by_category()
         
         # Format data for the LLM
-        expense_summary = "\n".join([f"- {row['category']}: ${row['amount']:.2f}" for _, row in monthly_expenses.iterrows()])
+        expense_summary = "\n".join([f"- {category}: ${amount:.2f}" for category, amount in sorted(monthly_expenses.items())])
         
         prompt = f"""
         As a financial advisor, create a personalized monthly budget based on this data:
@@ -354,7 +954,7 @@ class FinanceAgent:
         Current Monthly Expenses:
         {expense_summary}
         
-        Total Expenses: ${expenses['amount'].sum():.2f}
+        Total Expenses: ${self.aggregates.expenses():.2f}
         
         Create a recommended budget allocation using the 50/30/20 rule (50% needs, 30% wants, 20% savings)
         or another appropriate framework. Specify dollar amounts for each category and provide 2-3 specific
@@ -363,24 +963,22 @@ class FinanceAgent:
         Format the response in markdown.
         """
         
-        response = model.generate_content(prompt)
-        budget_plan = response.text.strip()
+        budget_plan = self.generate_text(prompt, MODEL_UNAVAILABLE, 'get_budget_recommendation')
         
         # Add this to the agent's memory
         self.add_to_chat_history('agent', f"Generated budget recommendation: {budget_plan[:100]}...")
         
         return budget_plan
 
+    @batched_memory_writes
     def get_financial_advice(self, query=None):
         """Get personalized financial advice based on transaction history and query"""
-        self.df['amount'] = pd.to_numeric(self.df['amount'], errors='coerce')
-        
         # Basic financial summary
-        income = self.df[self.df['amount'] > 0]['amount'].sum()
-        expenses = self.df[self.df['amount'] < 0]['amount'].sum() * -1
+        income = self.aggregates.income()
+        expenses = self.aggregates.expenses()
         savings_rate = ((income - expenses) / income * 100) if income > 0 else 0
         
-        categories = self.df.groupby('category')['amount'].sum().sort_values()
+        categories = pd.Series(self.aggregates.category_totals(), dtype=float).sort_values()
         top_expenses = categories[categories < 0].abs().nlargest(3)
         
         if top_expenses.empty:
@@ -422,8 +1020,7 @@ class FinanceAgent:
         Avoid generic advice - make it personalized based on the data.
         """
         
-        response = model.generate_content(prompt)
-        advice = response.text.strip()
+        advice = self.generate_text(prompt, MODEL_UNAVAILABLE, 'get_financial_advice')
         
         # Add to chat history
         if query:
@@ -432,32 +1029,54 @@ class FinanceAgent:
         
         return advice
 
+    @batched_memory_writes
     def set_budget_goal(self, category, amount):
         """Set a budget goal for a category"""
         self.memory['user_preferences']['budget_goals'][category] = float(amount)
-        self._save_memory()
+        self._save_memory('user_preferences')
         
         # Add to chat
         self.add_to_chat_history('agent', f"Budget goal set: {category} - ${amount:.2f}/month")
         
         return True
         
+    def generate_text(self, prompt, fallback, call_site):
+        """Response text for a prompt, or `fallback` when the model can't be reached"""
+        try:
+            return self.model.generate_content(prompt, call_site=call_site).text.strip()
+        except LLMError as e:
+            print(f"Error generating {call_site} response: {e}")
+            return fallback
+
+    def _generate_in_background(self, prompt, fallback, call_site):
+        """Send a prompt on the shared pool and return a Future of the response text"""
+        def generate():
+            try:
+                response = self.model.generate_content(prompt, call_site=call_site)
+                return response.text.strip()
+            except Exception as e:
+                print(f"Error generating {call_site} response: {e}")
+                return fallback
+        return run_in_background(generate)
+
     def check_budget_progress(self):
         """Check progress against budget goals"""
         if not self.memory['user_preferences']['budget_goals']:
             return "No budget goals have been set yet."
+
+        progress_df, narrative = self.check_budget_progress_async()
+        return progress_df, narrative.result()
+
+    def check_budget_progress_async(self):
+        """Budget progress right away, with the narrative as a Future"""
+        if not self.memory['user_preferences']['budget_goals']:
+            return pd.DataFrame(), completed("No budget goals have been set yet.")
             
         # Get current month's spending by category
         now = datetime.now()
         start_of_month = datetime(now.year, now.month, 1)
         
-        current_spending = self.df[
-            (self.df['date'] >= start_of_month) & 
-            (self.df['amount'] < 0)
-        ].copy()
-        
-        current_spending['amount'] = current_spending['amount'].abs()  # Make positive for readability
-        spending_by_category = current_spending.groupby('category')['amount'].sum().to_dict()
+        spending_by_category = self.aggregates.expenses_by_category(since_month=start_of_month.strftime('%Y-%m'))
         
         # Compare with goals
         progress = []
@@ -487,43 +1106,40 @@ class FinanceAgent:
         Keep your response brief (2-3 sentences) and mention the categories that need attention.
         """
         
-        try:
-            response = model.generate_content(prompt)
-            narrative = response.text.strip()
-        except:
-            narrative = "Here's your current budget progress for the month."
+        narrative = self._generate_in_background(
+            prompt, "Here's your current budget progress for the month.", 'check_budget_progress'
+        )
             
         return progress_df, narrative
 
-    def detect_unusual_transactions(self):
-        """Detect potentially unusual transactions"""
+    def detect_unusual_transactions(self, method='zscore'):
+        """Detect potentially unusual transactions
+
+        `method` is 'zscore' (mean + 2 std per category), 'robust' (median/MAD)
+        or 'rolling' (against the previous 30 transactions in the category).
+        """
+        unusual_df, explanation = self.detect_unusual_transactions_async(method)
+        return unusual_df, explanation.result()
+
+    def detect_unusual_transactions_async(self, method='zscore'):
+        """Unusual transactions right away, with the explanation as a Future"""
         if len(self.df) < 5:  # Need some history to detect unusual patterns
-            return None, "Not enough transaction history to detect unusual patterns."
+            return None, completed("Not enough transaction history to detect unusual patterns.")
             
-        # For each category, find transactions that are significantly higher than average
-        unusual = []
+        # For each category, find transactions that are significantly higher than average.
+        # The z-score detector reads per-category mean and std from the aggregate engine.
+        if method == 'zscore':
+            # Transactions more than 2 standard deviations from mean are unusual;
+            # need at least 3 transactions to establish a pattern
+            mask = DETECTORS['zscore'](self.df, k=2.0, min_count=3, stats=self.aggregates.category_stats())
+        else:
+            mask = DETECTORS[method](self.df)
         
-        for category in self.df['category'].unique():
-            cat_data = self.df[self.df['category'] == category].copy()
-            
-            if len(cat_data) >= 3:  # Need at least 3 transactions to establish a pattern
-                cat_data['amount'] = cat_data['amount'].abs()  # Work with absolute values
-                avg = cat_data['amount'].mean()
-                std = cat_data['amount'].std()
-                
-                # Transactions more than 2 standard deviations from mean are unusual
-                threshold = avg + (2 * std)
-                
-                unusual_in_category = cat_data[cat_data['amount'] > threshold].copy()
-                unusual.append(unusual_in_category)
-        
-        if not unusual:
-            return None, "No unusual transactions detected."
-            
-        unusual_df = pd.concat(unusual, ignore_index=True) if unusual else pd.DataFrame()
+        unusual_df = self.df[mask].reset_index(drop=True)
+        unusual_df['amount'] = unusual_df['amount'].abs()  # Work with absolute values
         
         if unusual_df.empty:
-            return None, "No unusual transactions detected."
+            return None, completed("No unusual transactions detected.")
             
         # Generate explanation
         prompt = f"""
@@ -534,54 +1150,73 @@ class FinanceAgent:
         Keep your explanation brief (2-3 sentences) and helpful.
         """
         
-        try:
-            response = model.generate_content(prompt)
-            explanation = response.text.strip()
-        except:
-            explanation = "I've detected some transactions that appear unusual based on your spending patterns."
+        explanation = self._generate_in_background(
+            prompt,
+            "I've detected some transactions that appear unusual based on your spending patterns.",
+            'detect_unusual_transactions'
+        )
             
         return unusual_df, explanation
 
+    def forecast_saving_plan(self, goal_amount, timeframe_months):
+        """Project income and spending per month over the timeframe and simulate the goal (see forecast.py)"""
+        return saving_plan(self.aggregates.cells, goal_amount, timeframe_months)
+
+    @batched_memory_writes
     def create_saving_plan(self, goal_amount, timeframe_months):
         """Create a personalized saving plan"""
-        # Calculate average monthly savings capacity
-        monthly_income = self.df[self.df['amount'] > 0]['amount'].sum() / max(1, len(self.df['date'].dt.month.unique()))
-        monthly_expenses = self.df[self.df['amount'] < 0]['amount'].sum() * -1 / max(1, len(self.df['date'].dt.month.unique()))
-        
-        current_savings_capacity = monthly_income - monthly_expenses
-        
-        # Required monthly savings for goal
-        required_monthly = float(goal_amount) / float(timeframe_months)
-        
-        # Categories with potential for savings
-        expense_by_category = self.df[self.df['amount'] < 0].copy()
-        expense_by_category['amount'] = expense_by_category['amount'].abs()
-        category_spending = expense_by_category.groupby('category')['amount'].agg(['sum', 'count']).reset_index()
+        # All the numbers come from the forecast; the AI only explains them
+        plan = self.forecast_saving_plan(goal_amount, timeframe_months)
+        required_monthly = plan.required_monthly
+        monthly = plan.monthly
+        
+        monthly_breakdown = "\n".join([
+            f"        - {month}: income ${row['income']:.2f}, expenses ${row['expenses']:.2f}, "
+            f"net ${row['net']:.2f}, saved so far ${row['cumulative']:.2f}"
+            for month, row in monthly.iterrows()
+        ])
+        category_projection = "\n".join([f"        - {category}: ${amount:.2f}/month"
+                                         for category, amount in plan.categories.items() if amount > 0])
+        scenario_text = "\n".join([
+            f"        - Cut discretionary spending by {row['cut']:.0%}: save ${row['monthly_savings']:.2f}/month, "
+            f"${row['total_saved']:.2f} in total, "
+            + (f"goal reached in month {int(row['months_to_goal'])}" if row['feasible'] else "goal not reached")
+            for _, row in plan.scenarios.iterrows()
+        ])
         
         prompt = f"""
-        Create a realistic saving plan to save ${goal_amount:.2f} in {timeframe_months} months.
+        Write a saving plan to save ${goal_amount:.2f} in {timeframe_months} months.
+        All figures below were computed from the user's transaction history; use them exactly and don't recalculate them.
         
-        Current financial situation:
-        - Monthly income: ${monthly_income:.2f}
-        - Monthly expenses: ${monthly_expenses:.2f}
-        - Current savings capacity: ${current_savings_capacity:.2f}/month
+        Forecast (based on {plan.history_months} months of history):
+        - Projected average monthly income: ${monthly['income'].mean():.2f}
+        - Projected average monthly expenses: ${monthly['expenses'].mean():.2f}
+        - Projected average monthly savings capacity: ${monthly['net'].mean():.2f}
         - Required savings for goal: ${required_monthly:.2f}/month
+        - Goal reached at current spending: {"yes" if plan.feasible else "no"}
+        - Chance of reaching the goal given past month-to-month variation: {plan.probability:.0%}
+        - Cut of discretionary spending (all but {', '.join(sorted(ESSENTIAL_CATEGORIES))}) needed: {plan.required_cut:.0%}
+        
+        Projected monthly spending by category:
+{category_projection or "        None"}
         
-        Spending by category:
-        {category_spending.to_string()}
+        Scenarios:
+{scenario_text}
         
-        Create a step-by-step saving plan that includes:
+        Monthly breakdown at current spending:
+{monthly_breakdown}
+        
+        Explain:
         1. Whether the goal is realistic given the timeframe
-        2. Specific categories where spending could be reduced
-        3. Estimated monthly saving amount
+        2. Specific categories where spending could be reduced, using the required cut
+        3. The monthly saving amount to aim for
         4. Any additional income strategies if needed
-        5. A monthly breakdown of the saving plan
+        5. The monthly breakdown above, as a markdown table
         
         Format the response in markdown.
         """
         
-        response = model.generate_content(prompt)
-        saving_plan = response.text.strip()
+        saving_plan_text = self.generate_text(prompt, MODEL_UNAVAILABLE, 'create_saving_plan')
         
         # Store this goal in memory
         if 'saving_goals' not in self.memory:
@@ -591,58 +1226,76 @@ class FinanceAgent:
             'date_created': datetime.now().strftime('%Y-%m-%d'),
             'goal_amount': float(goal_amount),
             'timeframe_months': int(timeframe_months),
-            'monthly_target': required_monthly
+            'monthly_target': required_monthly,
+            'projected_monthly_savings': float(monthly['net'].mean()),
+            'required_cut': plan.required_cut,
+            'probability': plan.probability
         })
         
-        self._save_memory()
+        self._save_memory('saving_goals')
         self.add_to_chat_history('agent', f"Created savings plan for ${goal_amount:.2f}")
         
-        return saving_plan
+        return saving_plan_text
 
+    @batched_memory_writes
     def chat(self, user_message):
         """Handle open-ended chat about finances"""
         # Add user message to history
         self.add_to_chat_history('user', user_message)
         
+        # Check if this looks like a specific financial question
+        query_prompt = f"""
+        Analyze this user message and determine the user's intent:
+        "{user_message}"
+        
+        Choose ONE of these categories that best matches their intent:
+        1. General Chat - Just conversational, greeting, or non-specific question
+        2. Analysis Question - Asking about specific spending patterns or financial analysis
+        3. Budget Question - Question about budgeting or spending limits
+        4. Advice Question - Asking for financial advice
+        5. Action Request - User wants to set a goal, plan, or take action
+        
+        Return ONLY the category number (1-5) without explanation.
+        """
+        
+        # Classify intent on the pool while the financial context is assembled
+        intent_future = self._generate_in_background(query_prompt, "1", 'chat')  # Default to general chat
+        
         # Format recent chat history for context
         chat_context = self.memory.get('chat_history', [])[-10:]
         formatted_chat = "\n".join([f"{msg['speaker']}: {msg['message']}" for msg in chat_context])
         
         # Get financial context
-        income = self.df[self.df['amount'] > 0]['amount'].sum()
-        expenses = self.df[self.df['amount'] < 0]['amount'].sum() * -1
+        income = self.aggregates.income()
+        expenses = self.aggregates.expenses()
         
-        categories = self.df.groupby('category')['amount'].sum()
+        categories = pd.Series(self.aggregates.category_totals(), dtype=float)
         top_expenses = categories[categories < 0].abs().nlargest(3)
         top_expense_text = ', '.join([f"{cat}: ${abs(amt):.2f}" for cat, amt in top_expenses.items()])
         
+        # Past transactions resembling what the user mentioned, e.g. a merchant name
+        related = self.find_similar_transactions(user_message, limit=5, min_score=0.4)
+        related_text = "\n".join([f"        - {row['date'].strftime('%Y-%m-%d')}: {row['description']}, ${row['amount']:.2f} ({row['category']})"
+                                   for _, row in related.iterrows()])
+
+        # Subscriptions and other regular bills
+        recurring = [s for s in self.get_recurring_payments() if s['expected_amount'] < 0]
+        recurring_text = "\n".join([f"        - {s['merchant']} ({s['category']}): ${-s['expected_amount']:.2f} {s['cadence']}, next due {s['next_due']}"
+                                     for s in recurring[:5]])
+        recurring_total = -sum(s['monthly_amount'] for s in recurring)
+
         financial_context = f"""
         Financial summary:
         - Total income: ${income:.2f}
         - Total expenses: ${expenses:.2f}
         - Top expenses: {top_expense_text}
+        Recurring payments (${recurring_total:.2f}/month in total):
+{recurring_text if recurring else "        None detected"}
+        Related past transactions:
+{related_text if not related.empty else "        None"}
         """
         
-        # Check if this looks like a specific financial question
-        query_prompt = f"""
-        Analyze this user message and determine the user's intent:
-        "{user_message}"
-        
-        Choose ONE of these categories that best matches their intent:
-        1. General Chat - Just conversational, greeting, or non-specific question
-        2. Analysis Question - Asking about specific spending patterns or financial analysis
-        3. Budget Question - Question about budgeting or spending limits
-        4. Advice Question - Asking for financial advice
-        5. Action Request - User wants to set a goal, plan, or take action
-        
-        Return ONLY the category number (1-5) without explanation.
-        """
-        
-        try:
-            intent_response = model.generate_content(query_prompt)
-            intent = intent_response.text.strip()
-        except:
-            intent = "1"  # Default to general chat
+        intent = intent_future.result()
         
         # Generate response based on intent
         if intent == "2":  # Analysis question
@@ -668,13 +1321,10 @@ class FinanceAgent:
             Return ONLY the action number (1-6) without explanation.
             """
             
-            try:
-                action_response = model.generate_content(action_prompt)
-                action = action_response.text.strip()
-            except:
-                action = "6"  # Default to other
+            action_future = self._generate_in_background(action_prompt, "6", 'chat')  # Default to other
                 
-            # Placeholder for action handling
+            # Placeholder for action handling; the reply doesn't depend on the
+            # classification, so both prompts run at the same time
             action_prompt = f"""
             The user wants to take a financial action:
             "{user_message}"
@@ -686,8 +1336,9 @@ class FinanceAgent:
             4. Provides a helpful suggestion related to their goal
             """
             
-            action_response = model.generate_content(action_prompt)
-            return action_response.text.strip()
+            action_response = self._generate_in_background(action_prompt, MODEL_UNAVAILABLE, 'chat')
+            action = action_future.result()
+            return action_response.result()
         else:  # General chat
             chat_prompt = f"""
             You are a helpful financial assistant AI agent. Respond to the user's message in a conversational way.
@@ -701,8 +1352,7 @@ class FinanceAgent:
             If the user asks about something unrelated to finances, gently bring the conversation back to financial topics.
             """
             
-            response = model.generate_content(chat_prompt)
-            chat_response = response.text.strip()
+            chat_response = self.generate_text(chat_prompt, MODEL_UNAVAILABLE, 'chat')
             
             # Add response to history
             self.add_to_chat_history('agent', chat_response)
@@ -0,0 +1,134 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Spending the plan won't suggest cutting
+ESSENTIAL_CATEGORIES = {'Housing', 'Utilities', 'Healthcare', 'Education'}
+
+# Share of discretionary spending cut in each simulated scenario
+SCENARIO_CUTS = [0.0, 0.1, 0.2, 0.3]
+
+
+def monthly_matrix(cells):
+    """Income and per-category expenses (as positive numbers) for every month from first to last
+
+    `cells` are AggregateEngine cells keyed by (month, category, sign).
+    Months without transactions are filled with zeros.
+    """
+    rows = [(month, 'Income' if sign > 0 else (category or 'Other'), total if sign > 0 else -total)
+            for (month, category, sign), (_, total, _) in cells.items() if month and sign != 0]
+    if not rows:
+        return pd.DataFrame(columns=['Income'], index=pd.PeriodIndex([], freq='M'), dtype=float)
+    frame = pd.DataFrame(rows, columns=['month', 'column', 'amount'])
+    matrix = frame.pivot_table(index='month', columns='column', values='amount', aggfunc='sum', fill_value=0.0)
+    matrix.index = pd.PeriodIndex(matrix.index, freq='M')
+    matrix = matrix.reindex(pd.period_range(matrix.index.min(), matrix.index.max(), freq='M'), fill_value=0.0)
+    if 'Income' not in matrix.columns:
+        matrix['Income'] = 0.0
+    matrix.columns.name = None
+    return matrix
+
+
+def seasonal_factors(history, min_years=2):
+    """Calendar-month factor per column (12 x columns); all ones with less than `min_years` of history"""
+    factors = pd.DataFrame(1.0, index=range(1, 13), columns=history.columns)
+    if len(history) < 12 * min_years:
+        return factors
+    by_month = history.groupby(history.index.month).mean()
+    overall = history.mean()
+    seasonal = by_month.div(overall.where(overall > 0)).clip(0.5, 2.0)
+    return seasonal.reindex(factors.index).fillna(1.0)
+
+
+def project(history, months, start=None, window=6):
+    """Projected values for `months` months from `start` (default: right after the history), per column
+
+    Each column's level is the mean of its last `window` deseasonalized
+    months, and the projection re-applies the calendar-month factors.
+    """
+    future = pd.period_range(start or history.index[-1] + 1, periods=months, freq='M')
+    factors = seasonal_factors(history)
+    recent = history.iloc[-window:]
+    level = (recent / factors.loc[recent.index.month].to_numpy()).mean()
+    values = level.to_numpy()[None, :] * factors.loc[future.month].to_numpy()
+    return pd.DataFrame(values, index=future, columns=history.columns)
+
+
+class SavingPlan:
+    """Monthly projection and goal feasibility for a saving goal
+
+    `monthly` holds projected income, expenses, net and cumulative savings per
+    month; `categories` the average projected monthly spend per category;
+    `scenarios` the outcome of cutting discretionary spending by each share in
+    SCENARIO_CUTS. `probability` is the share of simulated paths (historical
+    month-to-month variation resampled with a fixed seed) that reach the goal.
+    """
+
+    def __init__(self, goal_amount, timeframe_months, history, projected, n_paths=2000, seed=0):
+        self.goal_amount = float(goal_amount)
+        self.timeframe_months = int(timeframe_months)
+        self.history_months = len(history)
+        self.required_monthly = self.goal_amount / self.timeframe_months
+
+        income = projected['Income'].to_numpy()
+        expense_columns = [column for column in projected.columns if column != 'Income']
+        expenses = projected[expense_columns].to_numpy()
+        net = income - expenses.sum(axis=1)
+        self.monthly = pd.DataFrame({
+            'income': income,
+            'expenses': expenses.sum(axis=1),
+            'net': net,
+            'cumulative': net.cumsum(),
+        }, index=projected.index.astype(str))
+        self.categories = projected[expense_columns].mean().sort_values(ascending=False)
+
+        # All scenarios at once: savings (scenarios x months) = income - expenses kept
+        discretionary = np.array([column not in ESSENTIAL_CATEGORIES for column in expense_columns], dtype=bool)
+        cuts = np.asarray(SCENARIO_CUTS)[:, None] * discretionary[None, :]
+        savings = income[None, :] - ((1 - cuts)[:, None, :] * expenses[None, :, :]).sum(axis=2)
+        cumulative = savings.cumsum(axis=1)
+        reached = cumulative >= self.goal_amount
+        self.scenarios = pd.DataFrame({
+            'cut': SCENARIO_CUTS,
+            'monthly_savings': savings.mean(axis=1),
+            'total_saved': cumulative[:, -1],
+            'feasible': reached[:, -1],
+            'months_to_goal': np.where(reached.any(axis=1), reached.argmax(axis=1) + 1, np.nan),
+        })
+
+        # Uniform cut of discretionary spending that exactly closes the gap
+        discretionary_total = expenses[:, discretionary].sum()
+        shortfall = self.goal_amount - net.sum()
+        if shortfall <= 0:
+            self.required_cut = 0.0
+        elif discretionary_total > 0:
+            self.required_cut = min(shortfall / discretionary_total, 1.0)
+        else:
+            self.required_cut = 1.0
+
+        # Resample historical deviations of the monthly net to gauge the odds
+        history_net = (history['Income'] - history.drop(columns='Income').sum(axis=1)).to_numpy()[-24:]
+        deviations = history_net - history_net.mean() if len(history_net) > 1 else np.zeros(1)
+        rng = np.random.default_rng(seed)
+        paths = net[None, :] + rng.choice(deviations, size=(n_paths, len(net)))
+        self.probability = float((paths.sum(axis=1) >= self.goal_amount).mean())
+
+    @property
+    def feasible(self):
+        return bool(self.monthly['cumulative'].iloc[-1] >= self.goal_amount)
+
+
+def saving_plan(cells, goal_amount, timeframe_months, today=None, **options):
+    """Project the aggregate cells forward over the timeframe and evaluate the goal
+
+    The current calendar month is left out of the fit since it is incomplete;
+    the projection starts with it.
+    """
+    history = monthly_matrix(cells)
+    current = pd.Period(today or datetime.now(), freq='M')
+    if len(history) > 1 and history.index[-1] >= current:
+        history = history[history.index < current]
+    if history.empty:
+        history = pd.DataFrame({'Income': [0.0]}, index=pd.PeriodIndex([current - 1], freq='M'))
+    projected = project(history, int(timeframe_months), start=max(history.index[-1] + 1, current))
+    return SavingPlan(goal_amount, timeframe_months, history, projected, **options)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+
+class FrameBuffer:
+    """Growable column arrays behind the agent's transactions DataFrame
+
+    Rows are written into spare capacity at the end of each column, and the
+    arrays double in size when they fill up, so adding k rows costs O(k)
+    amortized instead of a copy of the whole history. frame() wraps the
+    filled part of the arrays without copying. Text columns are kept as
+    object arrays so they can be written in place.
+
+    Frames handed out share memory with the buffer but never change
+    afterwards: appends only write past the rows they cover, and set_values
+    writes to a fresh copy of its column.
+    """
+
+    def __init__(self, df, min_capacity=1024):
+        self.columns = list(df.columns)
+        self.length = len(df)
+        capacity = max(min_capacity, 2 * self.length)
+        self.arrays = {}
+        for column in self.columns:
+            values = self._values(df[column])
+            array = np.empty(capacity, dtype=values.dtype)
+            array[:self.length] = values
+            self.arrays[column] = array
+
+    @staticmethod
+    def _values(series):
+        if pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_float_dtype(series):
+            return series.to_numpy()
+        return series.to_numpy(dtype=object)
+
+    def append(self, rows):
+        needed = self.length + len(rows)
+        capacity = len(next(iter(self.arrays.values()), []))
+        if needed > capacity:
+            capacity = max(needed, 2 * capacity)
+            for column, array in self.arrays.items():
+                grown = np.empty(capacity, dtype=array.dtype)
+                grown[:self.length] = array[:self.length]
+                self.arrays[column] = grown
+        for column, array in self.arrays.items():
+            if column in rows:
+                array[self.length:needed] = self._values(rows[column])
+            elif array.dtype == object:
+                array[self.length:needed] = None
+            else:
+                array[self.length:needed] = np.array('NaT' if array.dtype.kind == 'M' else np.nan, dtype=array.dtype)
+        self.length = needed
+
+    def set_values(self, positions, column, values):
+        """Overwrite `column` at the given row positions"""
+        array = self.arrays[column].copy()
+        array[positions] = values
+        self.arrays[column] = array
+
+    def frame(self):
+        return pd.DataFrame(
+            {column: pd.Series(self.arrays[column][:self.length], dtype=self.arrays[column].dtype, copy=False)
+             for column in self.columns},
+            copy=False
+        )
@@ -0,0 +1,94 @@
+import os
+import re
+import pandas as pd
+from transaction_store import EXCEL_SHEET
+
+REQUIRED_COLUMNS = ['date', 'amount', 'description']
+
+
+def _size_of(source):
+    if hasattr(source, 'size'):
+        return source.size
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    return None
+
+
+def iter_csv_chunks(source, chunksize=5000):
+    """Yield (chunk, fraction done) from a CSV path or file object"""
+    size = _size_of(source)
+    with pd.read_csv(source, chunksize=chunksize) as reader:
+        for chunk in reader:
+            position = source.tell() if hasattr(source, 'tell') else None
+            yield chunk, (min(position / size, 1.0) if size and position is not None else None)
+
+
+def iter_xlsx_chunks(source, chunksize=5000):
+    """Yield (chunk, fraction done) from the first sheet of an .xlsx, streaming rows
+
+    The continuation sheets of an export too long for one sheet
+    (see write_transactions_excel) follow the first.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheets = [workbook.worksheets[0]] + [
+            sheet for sheet in workbook.worksheets[1:]
+            if re.fullmatch(re.escape(EXCEL_SHEET) + r' \d+', sheet.title)
+        ]
+        total_rows = sum(sheet.max_row or 0 for sheet in sheets)
+        read = 0
+        for sheet in sheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            columns = [str(column) if column is not None else '' for column in header]
+
+            buffer = []
+            read += 1
+            for row in rows:
+                buffer.append(row)
+                read += 1
+                if len(buffer) >= chunksize:
+                    yield pd.DataFrame(buffer, columns=columns), (min(read / total_rows, 1.0) if total_rows else None)
+                    buffer = []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=columns), (min(read / total_rows, 1.0) if total_rows else 1.0)
+    finally:
+        workbook.close()
+
+
+def iter_chunks(source, name, chunksize=5000):
+    """Stream a CSV or XLSX statement in chunks of at most `chunksize` rows"""
+    if name.lower().endswith('.csv'):
+        return iter_csv_chunks(source, chunksize)
+    return iter_xlsx_chunks(source, chunksize)
+
+
+def preview(source, name, rows=5):
+    """First rows of a statement without reading the whole file"""
+    head = next(iter(iter_chunks(source, name, chunksize=rows)), (pd.DataFrame(), None))[0]
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return head
+
+
+def parse_chunk(chunk):
+    """Validate and parse a raw chunk; returns (parsed rows, number of invalid rows)"""
+    chunk = chunk.rename(columns=lambda column: str(column).strip().lower())
+    missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"File must contain these columns: {', '.join(REQUIRED_COLUMNS)}")
+
+    amounts = chunk['amount']
+    if not pd.api.types.is_numeric_dtype(amounts):
+        amounts = amounts.astype(str).str.replace(r'[$,\s]', '', regex=True)
+    parsed = pd.DataFrame({
+        'date': pd.to_datetime(chunk['date'], errors='coerce'),
+        'amount': pd.to_numeric(amounts, errors='coerce'),
+        'description': chunk['description'].fillna('').astype(str).str.strip()
+    })
+    valid = parsed['date'].notna() & parsed['amount'].notna() & (parsed['description'] != '')
+    return parsed[valid].reset_index(drop=True), int((~valid).sum())
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+DAY = 24 * 60 * 60
+
+# Seconds a cached response stays valid, per calling method. 0 disables caching.
+DEFAULT_TTLS = {
+    '_categorize_with_llm': 30 * DAY,
+    '_categorize_batch_with_llm': 30 * DAY,
+    'check_budget_progress': DAY,
+    'detect_unusual_transactions': DAY,
+    '_generate_new_insights': 0,  # each insight is meant to be new
+    'analyze_data': 0,
+    'chat': 0,
+}
+
+
+class CachedResponse:
+    """Minimal stand-in for a model response served from the cache"""
+
+    def __init__(self, text):
+        self.text = text
+        self.cached = True
+
+
+class CachedModel:
+    """Content-addressed on-disk cache in front of model.generate_content
+
+    Responses are keyed by a hash of the model name and prompt and stored as
+    one JSON file each under `cache_dir`. Entries expire after the TTL of the
+    calling method and the least recently used ones are evicted beyond
+    `max_entries`.
+    """
+
+    def __init__(self, model, model_name, cache_dir='.llm_cache', max_entries=2000,
+                 default_ttl=60 * 60, ttls=None):
+        self.model = model
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = OrderedDict()
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the LRU order from file modification times"""
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if name.endswith('.json'):
+                        path = os.path.join(root, name)
+                        entries.append((os.path.getmtime(path), name[:-5]))
+        for _, key in sorted(entries):
+            self._index[key] = None
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _key(self, prompt):
+        return hashlib.sha256(f"{self.model_name}\0{prompt}".encode('utf-8')).hexdigest()
+
+    def generate_content(self, prompt, call_site=None):
+        call_site = call_site or sys._getframe(1).f_code.co_name
+        ttl = self.ttls.get(call_site, self.default_ttl)
+        if ttl <= 0:
+            return self.model.generate_content(prompt)
+
+        key = self._key(prompt)
+        text = self._read(key, ttl)
+        if text is not None:
+            with self._lock:
+                self.hits += 1
+            return CachedResponse(text)
+
+        response = self.model.generate_content(prompt)
+        with self._lock:
+            self.misses += 1
+        self._write(key, response.text, call_site)
+        return response
+
+    def _read(self, key, ttl):
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            if time.time() - entry['created'] > ttl:
+                return None
+            os.utime(path)  # persist recency for the LRU order
+            return entry['text']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, key, text, call_site):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'text': text, 'created': time.time(), 'call_site': call_site}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing LLM cache entry: {e}")
+            return
+
+        with self._lock:
+            self._index[key] = None
+            self._index.move_to_end(key)
+            evicted = []
+            while len(self._index) > self.max_entries:
+                evicted.append(self._index.popitem(last=False)[0])
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._index)
+        }
@@ -0,0 +1,249 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+
+class LLMError(Exception):
+    """A model call that failed after all retries"""
+
+
+class LLMResponse:
+    """Text of a model reply, shaped like the genai response objects the agent reads
+
+    Token counts are None when the backend doesn't report usage.
+    """
+
+    def __init__(self, text, prompt_tokens=None, response_tokens=None, coalesced=False):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.response_tokens = response_tokens
+        self.coalesced = coalesced
+
+
+class TokenBucket:
+    """Allow `rate` requests per second on average with bursts of up to `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting for it to refill; False if that takes longer than timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class GeminiBackend:
+    """Google Gemini through google-generativeai, configured on first use"""
+
+    def __init__(self, model_name, api_key=None):
+        self.name = model_name
+        self.api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key)
+                self._model = genai.GenerativeModel(self.name)
+            return self._model
+
+    def generate(self, prompt, timeout):
+        response = self._get_model().generate_content(prompt, request_options={'timeout': timeout})
+        usage = getattr(response, 'usage_metadata', None)
+        return LLMResponse(
+            response.text,
+            getattr(usage, 'prompt_token_count', None),
+            getattr(usage, 'candidates_token_count', None)
+        )
+
+
+# Keywords the stub backend uses to pick a plausible category
+STUB_KEYWORDS = {
+    'Food': ['grocery', 'restaurant', 'coffee', 'lunch', 'dinner', 'pizza', 'cafe', 'food'],
+    'Transportation': ['uber', 'lyft', 'taxi', 'bus', 'train', 'fuel', 'gas station', 'parking'],
+    'Housing': ['rent', 'mortgage'],
+    'Entertainment': ['netflix', 'spotify', 'cinema', 'movie', 'game', 'concert'],
+    'Shopping': ['amazon', 'store', 'mall', 'clothes', 'shop'],
+    'Utilities': ['electric', 'water', 'internet', 'phone', 'utility'],
+    'Healthcare': ['pharmacy', 'doctor', 'hospital', 'dental', 'clinic'],
+    'Education': ['tuition', 'course', 'book', 'school'],
+    'Travel': ['hotel', 'flight', 'airline', 'airbnb'],
+    'Income': ['salary', 'payroll', 'deposit', 'refund'],
+}
+
+
+class StubBackend:
+    """Deterministic offline backend for tests and throughput measurements
+
+    Replies depend only on the prompt: categorization prompts get a keyword
+    guess in the expected format, classification prompts a fixed number,
+    code prompts a small valid snippet and everything else a canned sentence.
+    `latency` seconds are slept per call to simulate the network.
+    """
+
+    name = 'stub'
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, timeout):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            if timeout is not None and self.latency > timeout:
+                time.sleep(timeout)
+                raise TimeoutError(f"stub call exceeded {timeout}s")
+            time.sleep(self.latency)
+        return self.reply(prompt)
+
+    def reply(self, prompt):
+        categories = re.search(r'one of these categories: (.+)', prompt)
+        categories = [c.strip() for c in categories.group(1).split(',')] if categories else []
+        if 'JSON array' in prompt:
+            items = re.findall(r'^\s*(\d+)\. Transaction: (.*?) \| Amount: \$(\S+)', prompt, re.M)
+            return json.dumps([{'id': int(i), 'category': self._category(desc, amount, categories)}
+                               for i, desc, amount in items])
+        if 'Categorize this transaction' in prompt:
+            match = re.search(r'Transaction: (.*)\n\s*Amount: \$(\S+)', prompt)
+            return self._category(match.group(1), match.group(2), categories) if match else 'Other'
+        if 'code-generating assistant' in prompt:
+            return "result = df.groupby('category')['amount'].sum().sort_values().to_string()\nfig = None"
+        if 'number (1-' in prompt:
+            return '1'
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        return f"Stub response {digest}: review your largest spending categories and set a monthly budget."
+
+    def _category(self, description, amount, categories):
+        text = description.lower()
+        try:
+            if float(amount) > 0 and 'Income' in categories:
+                return 'Income'
+        except ValueError:
+            pass
+        for category, words in STUB_KEYWORDS.items():
+            if category in categories and any(word in text for word in words):
+                return category
+        return 'Other' if 'Other' in categories or not categories else categories[-1]
+
+
+class LLMClient:
+    """Rate-limited, retrying front end for a model backend
+
+    Calls wait for a token-bucket slot and at most `max_concurrency` run at
+    once. Failures are retried with exponential backoff and jitter, each
+    attempt bounded by `timeout` seconds. Identical prompts already in flight
+    share one backend call. After the last retry an LLMError is raised.
+    Backends return the reply text, or an LLMResponse when they report usage.
+    """
+
+    def __init__(self, backend, rate=4.0, burst=8, max_concurrency=4, max_retries=3,
+                 backoff=0.5, max_backoff=8.0, timeout=30.0):
+        self.backend = backend
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.calls = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.failures = 0
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def generate_content(self, prompt, call_site=None, timeout=None):
+        with self._lock:
+            future = self._in_flight.get(prompt)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[prompt] = future
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return LLMResponse(future.result().text, coalesced=True)
+
+        try:
+            response = self._call(prompt, self.timeout if timeout is None else timeout)
+            if not isinstance(response, LLMResponse):
+                response = LLMResponse(response)
+            future.set_result(response)
+        except LLMError as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(prompt, None)
+        return response
+
+    def _call(self, prompt, timeout):
+        for attempt in range(self.max_retries + 1):
+            try:
+                if not self.bucket.acquire(timeout):
+                    raise TimeoutError("timed out waiting for the rate limiter")
+                with self._slots:
+                    return self.backend.generate(prompt, timeout)
+            except ValueError as e:
+                # The reply was blocked or empty; asking again won't help
+                error = e
+                break
+            except Exception as e:
+                error = e
+                if attempt < self.max_retries:
+                    with self._lock:
+                        self.retries += 1
+                    delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                    time.sleep(delay * random.uniform(0.5, 1.0))
+        with self._lock:
+            self.failures += 1
+        raise LLMError(f"Model call failed: {error}") from error
+
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'retries': self.retries,
+            'failures': self.failures
+        }
+
+
+def create_client(model_name, api_key=None, backend=None, **options):
+    """LLMClient for the backend named by `backend` or $LLM_BACKEND ('gemini' or 'stub')
+
+    $LLM_RATE_LIMIT overrides the requests per second allowed by default.
+    """
+    backend = backend or os.getenv('LLM_BACKEND', 'gemini')
+    if os.getenv('LLM_RATE_LIMIT') and 'rate' not in options:
+        options['rate'] = float(os.getenv('LLM_RATE_LIMIT'))
+    if backend == 'stub':
+        return LLMClient(StubBackend(float(os.getenv('LLM_STUB_LATENCY', '0'))), **options)
+    if backend == 'gemini':
+        return LLMClient(GeminiBackend(model_name, api_key), **options)
+    raise ValueError(f"Unknown LLM backend: {backend}")
@@ -0,0 +1,175 @@
+import json
+import sys
+import threading
+import time
+from collections import deque
+
+# Rough size of a token for replies that don't report usage (cached, stub)
+CHARS_PER_TOKEN = 4
+
+QUANTILES = [0.5, 0.9, 0.99]
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class CallSiteStats:
+    """Running totals for one call site plus its last `window` call durations"""
+
+    def __init__(self, window):
+        self.calls = 0
+        self.errors = 0
+        self.cache = {'hit': 0, 'coalesced': 0, 'miss': 0}
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.cost = 0.0
+        self.total_seconds = 0.0
+        self.durations = deque(maxlen=window)
+        self.last_error = None
+
+
+class LLMMetrics:
+    """Per call site latency, token, cache and error statistics of model calls
+
+    Totals are kept since start-up; percentiles cover the last `window`
+    calls of each call site. Prices are per million tokens and only apply
+    to calls that reached the model (cache misses).
+    """
+
+    def __init__(self, window=500, input_price=0.0, output_price=0.0):
+        self.window = window
+        self.input_price = input_price
+        self.output_price = output_price
+        self.started = time.time()
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def record(self, call_site, seconds, cache='miss', prompt_tokens=0, response_tokens=0, error=None):
+        with self._lock:
+            stats = self._sites.get(call_site)
+            if stats is None:
+                stats = self._sites[call_site] = CallSiteStats(self.window)
+            stats.calls += 1
+            stats.total_seconds += seconds
+            stats.durations.append(seconds)
+            if error is not None:
+                stats.errors += 1
+                stats.last_error = error
+                return
+            stats.cache[cache] += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.response_tokens += response_tokens
+            if cache == 'miss':
+                stats.cost += (prompt_tokens * self.input_price + response_tokens * self.output_price) / 1e6
+
+    def summary(self):
+        """One dict per call site, slowest (by p90) first"""
+        with self._lock:
+            sites = [(name, stats, sorted(stats.durations)) for name, stats in self._sites.items()]
+            rows = []
+            for name, stats, durations in sites:
+                row = {
+                    'call_site': name,
+                    'calls': stats.calls,
+                    'errors': stats.errors,
+                    'cache_hits': stats.cache['hit'],
+                    'coalesced': stats.cache['coalesced'],
+                    'misses': stats.cache['miss'],
+                    'prompt_tokens': stats.prompt_tokens,
+                    'response_tokens': stats.response_tokens,
+                    'cost': round(stats.cost, 6),
+                    'mean_s': round(stats.total_seconds / stats.calls, 4),
+                    'total_s': round(stats.total_seconds, 3),
+                    'last_error': stats.last_error,
+                }
+                for q in QUANTILES:
+                    row[f'p{int(q * 100)}_s'] = round(percentile(durations, q), 4)
+                rows.append(row)
+        return sorted(rows, key=lambda row: row['p90_s'], reverse=True)
+
+    def to_json(self):
+        return json.dumps({
+            'since': self.started,
+            'window': self.window,
+            'call_sites': self.summary()
+        }, indent=2)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        summary = self.summary()
+        metric('llm_calls_total', 'counter', "Model calls by call site and cache status", [
+            ({'call_site': row['call_site'], 'cache': cache}, row[column])
+            for row in summary
+            for cache, column in [('hit', 'cache_hits'), ('coalesced', 'coalesced'), ('miss', 'misses')]
+        ])
+        metric('llm_errors_total', 'counter', "Model calls that raised",
+               [({'call_site': row['call_site']}, row['errors']) for row in summary])
+        metric('llm_tokens_total', 'counter', "Prompt and response tokens", [
+            ({'call_site': row['call_site'], 'direction': direction}, row[f'{direction}_tokens'])
+            for row in summary for direction in ('prompt', 'response')
+        ])
+        metric('llm_cost_total', 'counter', "Estimated spend on model calls",
+               [({'call_site': row['call_site']}, row['cost']) for row in summary])
+        lines.append("# HELP llm_call_seconds Wall time of model calls (quantiles over the recent window)")
+        lines.append("# TYPE llm_call_seconds summary")
+        for row in summary:
+            for q in QUANTILES:
+                lines.append(f'llm_call_seconds{{call_site="{row["call_site"]}",quantile="{q}"}} '
+                             f'{row[f"p{int(q * 100)}_s"]}')
+            lines.append(f'llm_call_seconds_sum{{call_site="{row["call_site"]}"}} {row["total_s"]}')
+            lines.append(f'llm_call_seconds_count{{call_site="{row["call_site"]}"}} {row["calls"]}')
+        return "\n".join(lines) + "\n"
+
+
+class InstrumentedModel:
+    """Records every generate_content call on the wrapped model in an LLMMetrics
+
+    The call site defaults to the name of the calling method and is passed
+    on, so the cache below still sees it.
+    """
+
+    def __init__(self, model, metrics):
+        self.model = model
+        self.metrics = metrics
+
+    def generate_content(self, prompt, call_site=None):
+        call_site = call_site or sys._getframe(1).f_code.co_name
+        start = time.perf_counter()
+        try:
+            response = self.model.generate_content(prompt, call_site=call_site)
+        except Exception as e:
+            self.metrics.record(call_site, time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+            raise
+        seconds = time.perf_counter() - start
+
+        if getattr(response, 'cached', False):
+            cache = 'hit'
+        elif getattr(response, 'coalesced', False):
+            cache = 'coalesced'
+        else:
+            cache = 'miss'
+        prompt_tokens = getattr(response, 'prompt_tokens', None)
+        response_tokens = getattr(response, 'response_tokens', None)
+        self.metrics.record(
+            call_site, seconds, cache,
+            estimate_tokens(prompt) if prompt_tokens is None else prompt_tokens,
+            estimate_tokens(response.text) if response_tokens is None else response_tokens
+        )
+        return response
@@ -0,0 +1,102 @@
+import math
+import zlib
+from collections import Counter
+import pandas as pd
+from category_cache import normalize_description, cache_keys
+
+
+def _hash(feature, n_features):
+    return zlib.crc32(feature.encode('utf-8')) % n_features
+
+
+class LocalCategorizer:
+    """Offline multinomial naive Bayes over hashed word n-grams
+
+    Trained on the labeled history and kept up to date as rows are added, so
+    it can answer the common merchants locally and leave only uncertain ones
+    to the AI. Training groups rows by (normalized description, sign,
+    category), so repeated merchants cost one update each.
+    """
+
+    def __init__(self, n_features=2 ** 18, alpha=0.1, threshold=0.9, min_examples=20):
+        self.n_features = n_features
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_examples = min_examples
+        self.reset()
+
+    def reset(self):
+        self.n_examples = 0
+        self.class_counts = {}
+        self.feature_counts = {}
+        self.feature_totals = {}
+        self.vocabulary = set()
+
+    def features(self, description, amount):
+        """Hashed unigrams, bigrams and the amount sign"""
+        return self._features(normalize_description(description), float(amount) < 0)
+
+    def _features(self, normalized, expense):
+        words = normalized.split()
+        grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        grams.append('__expense__' if expense else '__income__')
+        return [_hash(gram, self.n_features) for gram in grams]
+
+    def fit(self, descriptions, amounts, categories):
+        self.reset()
+        self.partial_fit(descriptions, amounts, categories)
+
+    def partial_fit(self, descriptions, amounts, categories, weight=1):
+        """Add (or with weight=-1, remove) labeled examples"""
+        for (key, category), count in self._group(descriptions, amounts, categories).items():
+            sign, normalized = key.split('|', 1)
+            features = self._features(normalized, sign == '-')
+            count *= weight
+            counts = self.feature_counts.setdefault(category, {})
+            for feature in features:
+                counts[feature] = counts.get(feature, 0) + count
+                self.vocabulary.add(feature)
+            self.feature_totals[category] = self.feature_totals.get(category, 0) + count * len(features)
+            self.class_counts[category] = self.class_counts.get(category, 0) + count
+            self.n_examples += count
+
+    @staticmethod
+    def _group(descriptions, amounts, categories):
+        """Counts per (merchant key, category) of the labeled rows"""
+        keys = cache_keys(descriptions, amounts)
+        if len(keys) < 64:
+            return Counter((key, category) for key, category in zip(keys, categories)
+                           if isinstance(category, str) and category)
+        examples = pd.DataFrame({'key': keys, 'category': pd.Series(categories, dtype=object).to_numpy()})
+        labeled = examples['category'].map(lambda category: isinstance(category, str) and bool(category))
+        return examples[labeled.astype(bool)].groupby(['key', 'category'], sort=False).size().to_dict()
+
+    def predict(self, description, amount):
+        """Return (category, confidence), or (None, 0.0) without enough training data"""
+        if self.n_examples < self.min_examples:
+            return None, 0.0
+
+        features = self.features(description, amount)
+        vocabulary_size = len(self.vocabulary)
+        scores = {}
+        for category, class_count in self.class_counts.items():
+            if class_count <= 0:
+                continue
+            counts = self.feature_counts[category]
+            denominator = math.log(self.feature_totals[category] + self.alpha * vocabulary_size)
+            score = math.log(class_count / self.n_examples)
+            for feature in features:
+                score += math.log(counts.get(feature, 0) + self.alpha) - denominator
+            scores[category] = score
+
+        if not scores:
+            return None, 0.0
+
+        best = max(scores, key=scores.get)
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / total
+
+    def predict_confident(self, description, amount):
+        """Return the predicted category only if it clears the confidence threshold"""
+        category, confidence = self.predict(description, amount)
+        return category if confidence >= self.threshold else None
@@ -0,0 +1,115 @@
+import functools
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+
+class MemoryStore:
+    """Write-behind persistence for the agent memory dict
+
+    Changed top-level keys are marked dirty and written as JSON lines to an
+    append-only journal, one flush per outermost batch() (normally one per
+    user action). Every `snapshot_every` flushes the whole memory is written
+    to a temp file and atomically renamed over the snapshot, and the journal
+    is truncated. Loading replays the journal over the snapshot, skipping a
+    torn final line, so a crash mid-write never corrupts saved memory.
+    """
+
+    def __init__(self, path, snapshot_every=50):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.snapshot_every = snapshot_every
+        self.memory = {}
+        self._dirty = set()
+        self._flushes_since_snapshot = 0
+        self.lock = threading.RLock()
+        self._local = threading.local()
+
+    def load(self):
+        memory = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    memory = json.load(f)
+            except ValueError as e:
+                print(f"Ignoring unreadable memory snapshot: {e}")
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r+b') as f:
+                valid_bytes = 0
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn write at the end of the journal: drop it so new entries start clean
+                        f.truncate(valid_bytes)
+                        break
+                    valid_bytes += len(line)
+                    if entry.get('deleted'):
+                        memory.pop(entry['key'], None)
+                    else:
+                        memory[entry['key']] = entry['value']
+
+        self.memory = memory
+        return memory
+
+    def mark(self, *keys):
+        """Mark keys (all keys if none are given) as changed"""
+        with self.lock:
+            self._dirty.update(keys or self.memory.keys())
+        if getattr(self._local, 'depth', 0) == 0:
+            self.flush()
+
+    @contextmanager
+    def batch(self):
+        """Defer flushing until the outermost batch on this thread exits"""
+        self._local.depth = getattr(self._local, 'depth', 0) + 1
+        try:
+            yield
+        finally:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                self.flush()
+
+    def flush(self):
+        with self.lock:
+            if not self._dirty:
+                return
+            lines = []
+            for key in sorted(self._dirty):
+                if key in self.memory:
+                    lines.append(json.dumps({'key': key, 'value': self.memory[key]}))
+                else:
+                    lines.append(json.dumps({'key': key, 'deleted': True}))
+            self._dirty.clear()
+
+            with open(self.journal_path, 'a') as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._flushes_since_snapshot += 1
+            if self._flushes_since_snapshot >= self.snapshot_every:
+                self.snapshot()
+
+    def snapshot(self):
+        """Atomically write the full memory and truncate the journal"""
+        with self.lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.memory, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            open(self.journal_path, 'w').close()
+            self._flushes_since_snapshot = 0
+
+
+def batched_memory_writes(method):
+    """Coalesce the memory writes of an agent method into a single flush"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.memory_store.batch():
+            return method(self, *args, **kwargs)
+    return wrapper
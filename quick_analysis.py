@@ -0,0 +1,192 @@
+import inspect
+import re
+from datetime import datetime, timedelta
+import pandas as pd
+from analysis_cache import normalize_query
+from recurring import detect_recurring, is_active
+
+DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Words that don't change what a question asks. A keyword match is refused
+# when the query has any other word left once the analysis's own words are
+# taken out, since the built-in would silently ignore it (a merchant, a
+# category, a time window); the query then goes to generation instead.
+FILLER_WORDS = {
+    'a', 'all', 'am', 'an', 'and', 'are', 'by', 'can', 'chart', 'did', 'display', 'do', 'does', 'for',
+    'give', 'graph', 'has', 'have', 'how', 'i', "i'm", 'in', 'is', 'list', 'me', 'money', 'most', 'much',
+    'my', 'of', 'on', 'please', 'plot', 'see', 'show', 'tell', 'the', 'to', 'top', 'was', 'were', 'what',
+    "what's", 'whats', 'which', 'you',
+}
+
+# The one number a query may carry: the count of an analysis taking `n`
+COUNT = re.compile(r'\btop (\d+)\b|\b(\d+) (?:largest|biggest|highest)\b')
+
+
+def spending_by_category_last_month(df):
+    import plotly.express as px
+    recent = df[(df['date'] >= datetime.now() - timedelta(days=30)) & (df['amount'] < 0)]
+    if recent.empty:
+        return "No expenses in the last 30 days.", None
+    totals = recent['amount'].abs().groupby(recent['category']).sum().sort_values(ascending=False)
+    fig = px.pie(names=totals.index, values=totals.values, title='Spending by Category (Last 30 Days)')
+    lines = [f"- {category}: ${amount:,.2f}" for category, amount in totals.items()]
+    result = f"You spent ${totals.sum():,.2f} in the last 30 days:\n" + "\n".join(lines)
+    return result, fig
+
+
+def spending_over_time(df):
+    import plotly.express as px
+    expenses = df[df['amount'] < 0]
+    if expenses.empty:
+        return "No expenses recorded yet.", None
+    monthly = expenses['amount'].abs().groupby(expenses['date'].dt.to_period('M')).sum().sort_index()
+    monthly.index = monthly.index.astype(str)
+    fig = px.line(x=monthly.index, y=monthly.values, markers=True, title='Monthly Spending',
+                  labels={'x': 'Month', 'y': 'Spending ($)'})
+    result = f"Average monthly spending is ${monthly.mean():,.2f}."
+    if len(monthly) > 1:
+        change = monthly.iloc[-1] - monthly.iloc[-2]
+        direction = 'up' if change > 0 else 'down'
+        result += (f" {monthly.index[-1]} was {direction} ${abs(change):,.2f} on {monthly.index[-2]};"
+                   f" the highest month was {monthly.idxmax()} (${monthly.max():,.2f}).")
+    return result, fig
+
+
+def largest_expenses(df, n=5):
+    import plotly.express as px
+    top = df[df['amount'] < 0].nsmallest(n, 'amount')
+    if top.empty:
+        return "No expenses recorded yet.", None
+    top = top.assign(spent=top['amount'].abs(), day=top['date'].dt.strftime('%Y-%m-%d'))
+    fig = px.bar(top, x='description', y='spent', color='category', hover_data=['day'],
+                 title=f'Top {len(top)} Largest Expenses', labels={'spent': 'Amount ($)'})
+    lines = [f"{i}. {row.description} ({row.category}, {row.day}): ${row.spent:,.2f}"
+             for i, row in enumerate(top.itertuples(), 1)]
+    return f"Your {len(top)} largest expenses:\n" + "\n".join(lines), fig
+
+
+def income_vs_expenses_by_month(df):
+    import plotly.express as px
+    if df.empty:
+        return "No transactions recorded yet.", None
+    month = df['date'].dt.to_period('M').astype(str)
+    monthly = pd.DataFrame({
+        'Income': df['amount'].clip(lower=0).groupby(month).sum(),
+        'Expenses': (-df['amount'].clip(upper=0)).groupby(month).sum()
+    }).sort_index()
+    monthly['Net'] = monthly['Income'] - monthly['Expenses']
+    fig = px.bar(monthly.reset_index(names='Month'), x='Month', y=['Income', 'Expenses'], barmode='group',
+                 title='Income vs Expenses by Month', labels={'value': 'Amount ($)', 'variable': ''})
+    surplus = int((monthly['Net'] > 0).sum())
+    result = (f"Income exceeded expenses in {surplus} of {len(monthly)} months. "
+              f"Average monthly net: ${monthly['Net'].mean():,.2f}.")
+    return result, fig
+
+
+def spending_by_day_of_week(df):
+    import plotly.express as px
+    expenses = df[df['amount'] < 0]
+    if expenses.empty:
+        return "No expenses recorded yet.", None
+    totals = (expenses['amount'].abs().groupby(expenses['date'].dt.day_name()).sum()
+              .reindex(DAYS_OF_WEEK, fill_value=0.0))
+    fig = px.bar(x=totals.index, y=totals.values, title='Spending by Day of Week',
+                 labels={'x': 'Day', 'y': 'Spending ($)'})
+    share = totals.max() / totals.sum() * 100
+    result = f"You spend the most on {totals.idxmax()}s: ${totals.max():,.2f} ({share:.0f}% of all spending)."
+    return result, fig
+
+
+def subscription_spending(df):
+    import plotly.express as px
+    recurring = [s for s in detect_recurring(df) if s['expected_amount'] < 0 and is_active(s, df['date'].max())]
+    if not recurring:
+        return "No recurring payments detected.", None
+    table = pd.DataFrame(recurring)
+    table['monthly'] = -table['monthly_amount']
+    fig = px.bar(table, x='merchant', y='monthly', color='cadence', title='Recurring Payments per Month',
+                 labels={'monthly': 'Monthly cost ($)'})
+    lines = [f"- {s['merchant']}: ${-s['expected_amount']:,.2f} {s['cadence']}, next due {s['next_due']}"
+             for s in recurring]
+    result = f"You spend about ${table['monthly'].sum():,.2f} a month on recurring payments:\n" + "\n".join(lines)
+    return result, fig
+
+
+class QuickAnalysis:
+    """A built-in analysis and the queries it answers
+
+    `phrases` are matched exactly after normalization. `keywords` is a list of
+    alternatives groups; a query matches when it contains a word from every
+    group and nothing but FILLER_WORDS besides those words and the ones in
+    `honours` (what the analysis actually answers). The only other number
+    allowed is one count for an analysis taking `n`. Analyses import plotly
+    themselves so the registry loads without it.
+    """
+
+    def __init__(self, function, phrases, keywords, honours=(), takes_n=False):
+        self.function = function
+        self.phrases = {normalize_query(phrase) for phrase in phrases}
+        self.keywords = keywords
+        self.takes_n = takes_n
+        self.code = inspect.getsource(function)
+        # Longest first so "last 30 days" goes before "last"
+        own_words = sorted({word for group in keywords for word in group} | set(honours), key=len, reverse=True)
+        self._own_words = re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in own_words) + r')\w*')
+
+    def matches(self, query):
+        if query in self.phrases:
+            return True
+        if not all(any(word in query for word in group) for group in self.keywords):
+            return False
+        # Any number left over (a year, a second count) isn't filler either
+        rest = COUNT.sub(' ', query, count=1) if self.takes_n else query
+        rest = self._own_words.sub(' ', rest)
+        return all(word in FILLER_WORDS for word in re.findall(r"[\w']+", rest))
+
+    def run(self, df, query):
+        kwargs = {}
+        count = COUNT.search(normalize_query(query))
+        if self.takes_n and count:
+            kwargs['n'] = int(count.group(1) or count.group(2))
+        result, fig = self.function(df, **kwargs)
+        return result, fig, self.code
+
+
+QUICK_ANALYSES = [
+    QuickAnalysis(spending_by_category_last_month,
+                  ["Show my spending by category in the last month"],
+                  [['category', 'categories'], ['last month', 'past month', 'last 30 days']],
+                  honours=['spend', 'expense', 'past 30 days']),
+    QuickAnalysis(spending_over_time,
+                  ["How has my spending changed over time?"],
+                  [['spending', 'expenses'], ['over time', 'trend', 'by month', 'monthly'], ['changed', 'trend', 'evolve']],
+                  honours=['month', 'all time']),
+    QuickAnalysis(largest_expenses,
+                  ["What are my top 5 largest expenses?"],
+                  [['largest', 'biggest', 'highest'], ['expense', 'purchase', 'transaction']],
+                  honours=['all time', 'ever'],
+                  takes_n=True),
+    QuickAnalysis(income_vs_expenses_by_month,
+                  ["Show my income vs expenses by month"],
+                  [['income'], ['expense', 'spending'], ['by month', 'monthly', 'per month', 'each month']],
+                  honours=['vs', 'versus', 'compared to', 'month']),
+    QuickAnalysis(spending_by_day_of_week,
+                  ["What day of the week do I spend the most money?"],
+                  [['day of the week', 'day of week'], ['spend', 'spending', 'expense']]),
+    QuickAnalysis(subscription_spending,
+                  ["How much am I spending on subscription services?"],
+                  [['subscription', 'recurring']],
+                  honours=['spend', 'payment', 'service', 'cost', 'month', 'per month', 'monthly']),
+]
+
+
+def match_quick_analysis(query):
+    """The built-in analysis answering `query`, or None; exact phrases win over keyword matches"""
+    query = normalize_query(query)
+    for analysis in QUICK_ANALYSES:
+        if query in analysis.phrases:
+            return analysis
+    for analysis in QUICK_ANALYSES:
+        if analysis.matches(query):
+            return analysis
+    return None
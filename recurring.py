@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+from category_cache import cache_keys
+
+# (name, typical days between payments, allowed deviation of the median interval)
+CADENCES = [
+    ('weekly', 7, 2),
+    ('biweekly', 14, 3),
+    ('monthly', 30.4, 4),
+    ('quarterly', 91.3, 10),
+    ('yearly', 365.25, 20),
+]
+CALENDAR_STEPS = {'monthly': 1, 'quarterly': 3, 'yearly': 12}
+
+
+def keyed_frame(df):
+    """Columns detection needs, with the merchant key of every row"""
+    return pd.DataFrame({
+        'key': cache_keys(df['description'], df['amount']),
+        'date': pd.to_datetime(df['date']).values,
+        'amount': df['amount'].astype(float).values,
+        'description': df['description'].values,
+        'category': df['category'].values,
+    })
+
+
+def detect_recurring(df, min_occurrences=3, amount_tolerance=0.2):
+    """Recurring series in the transactions, one dict per merchant, largest monthly amount first
+
+    Rows are grouped by sign and normalized description and sorted by date
+    (O(N log N)); a group is recurring when its median interval matches a
+    cadence, the intervals are regular and the amounts stay within
+    `amount_tolerance` (relative median deviation) of the median amount.
+    """
+    if df.empty:
+        return []
+    return detect_in_frame(keyed_frame(df), min_occurrences, amount_tolerance)
+
+
+def detect_in_frame(frame, min_occurrences=3, amount_tolerance=0.2):
+    """detect_recurring on a keyed_frame"""
+    if frame.empty:
+        return []
+    frame = frame.sort_values(['key', 'date'], kind='stable')
+
+    gaps = frame['date'].diff().dt.days.astype(float)
+    frame['gap'] = gaps.where(frame['key'].eq(frame['key'].shift()))
+    grouped = frame.groupby('key', sort=False)
+    frame['gap_dev'] = (frame['gap'] - grouped['gap'].transform('median')).abs()
+    frame['amount_dev'] = (frame['amount'] - grouped['amount'].transform('median')).abs()
+
+    stats = grouped.agg(
+        occurrences=('date', 'size'),
+        interval=('gap', 'median'),
+        interval_dev=('gap_dev', 'median'),
+        expected=('amount', 'median'),
+        amount_dev=('amount_dev', 'median'),
+        last_date=('date', 'last'),
+        merchant=('description', 'last'),
+        category=('category', 'last'),
+    )
+    stats = stats[stats['occurrences'] >= min_occurrences]
+    if stats.empty:
+        return []
+
+    interval = stats['interval'].to_numpy()
+    matched = [np.abs(interval - days) <= tolerance for _, days, tolerance in CADENCES]
+    stats['cadence'] = np.select(matched, [name for name, _, _ in CADENCES], default='')
+    stats['cadence_days'] = np.select(matched, [days for _, days, _ in CADENCES], default=np.nan)
+    recurring = stats[
+        (stats['cadence'] != '')
+        & (stats['interval_dev'] <= np.maximum(2, 0.15 * stats['interval']))
+        & (stats['amount_dev'] <= amount_tolerance * stats['expected'].abs())
+    ]
+
+    series = []
+    for key, row in recurring.iterrows():
+        last_date = pd.Timestamp(row['last_date'])
+        if row['cadence'] in CALENDAR_STEPS:
+            next_due = last_date + pd.DateOffset(months=CALENDAR_STEPS[row['cadence']])
+        else:
+            next_due = last_date + pd.Timedelta(days=row['cadence_days'])
+        series.append({
+            'key': key,
+            'merchant': row['merchant'],
+            'category': row['category'],
+            'cadence': row['cadence'],
+            'interval_days': float(row['interval']),
+            'expected_amount': round(float(row['expected']), 2),
+            'monthly_amount': round(float(row['expected']) * 30.4 / row['cadence_days'], 2),
+            'occurrences': int(row['occurrences']),
+            'last_date': last_date.strftime('%Y-%m-%d'),
+            'next_due': next_due.strftime('%Y-%m-%d'),
+        })
+    series.sort(key=lambda s: abs(s['monthly_amount']), reverse=True)
+    return series
+
+
+def is_active(series, as_of):
+    """Whether a series hasn't missed two payments as of the given date"""
+    return pd.Timestamp(series['last_date']) + pd.Timedelta(days=2 * series['interval_days']) >= as_of
+
+
+class RecurringDetector:
+    """Recurring series kept current as transactions arrive
+
+    Keeps the rows as one keyed_frame sorted by merchant key plus a small
+    frame of rows added since, so new rows only re-run detection for the
+    merchants they touch: each merchant's rows are found by binary search
+    in the sorted frame. The added rows are merged in once they reach
+    `merge_fraction` of the sorted frame.
+    """
+
+    def __init__(self, min_occurrences=3, amount_tolerance=0.2, merge_fraction=0.05):
+        self.min_occurrences = min_occurrences
+        self.amount_tolerance = amount_tolerance
+        self.merge_fraction = merge_fraction
+        self.frame = keyed_frame(pd.DataFrame(columns=['date', 'amount', 'description', 'category']))
+        self.added = self.frame
+        self._keys = self.frame['key'].to_numpy()
+        self.series = {}
+        self.latest = None
+
+    def build(self, df):
+        frame = keyed_frame(df)
+        self.series = {s['key']: s for s in
+                       detect_in_frame(frame, self.min_occurrences, self.amount_tolerance)}
+        self._set_frame(frame)
+        self.added = frame.iloc[:0]
+        self.latest = frame['date'].max() if len(frame) else None
+
+    def update(self, rows):
+        """Add new rows and re-detect the merchants they belong to"""
+        new = keyed_frame(rows)
+        if new.empty:
+            return
+        self.added = pd.concat([self.added, new], ignore_index=True)
+        latest = new['date'].max()
+        self.latest = latest if self.latest is None else max(latest, self.latest)
+
+        keys = np.asarray(new['key'].unique(), dtype=object)
+        starts = np.searchsorted(self._keys, keys, side='left')
+        ends = np.searchsorted(self._keys, keys, side='right')
+        positions = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+        affected = pd.concat([self.frame.iloc[positions], self.added[self.added['key'].isin(keys)]],
+                             ignore_index=True)
+        for key in keys:
+            self.series.pop(key, None)
+        for series in detect_in_frame(affected, self.min_occurrences, self.amount_tolerance):
+            self.series[series['key']] = series
+
+        if len(self.added) > max(1000, self.merge_fraction * len(self.frame)):
+            self._set_frame(pd.concat([self.frame, self.added], ignore_index=True))
+            self.added = self.added.iloc[:0]
+
+    def _set_frame(self, frame):
+        self.frame = frame.sort_values('key', kind='stable', ignore_index=True)
+        self._keys = self.frame['key'].to_numpy(dtype=object)
+
+    def active(self):
+        """Series that haven't missed two payments as of the latest transaction, largest first"""
+        if self.latest is None:
+            return []
+        active = [s for s in self.series.values() if is_active(s, self.latest)]
+        return sorted(active, key=lambda s: abs(s['monthly_amount']), reverse=True)
@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+import tempfile
+
+FINGERPRINT_KEY = b'fingerprint'
+
+
+def file_fingerprint(path, block_size=1 << 20):
+    """Fingerprint a source file by size, modification time and content hash"""
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest.hexdigest()}
+
+
+def read_snapshot(path):
+    """Memory-map a Feather snapshot and return (DataFrame, fingerprint)
+
+    Returns (None, None) when there is no readable snapshot or pyarrow is not installed.
+    """
+    if not os.path.exists(path):
+        return None, None
+    try:
+        import pyarrow.feather as feather
+        table = feather.read_table(path, memory_map=True)
+        metadata = table.schema.metadata or {}
+        fingerprint = json.loads(metadata[FINGERPRINT_KEY])
+        table = table.replace_schema_metadata(None)
+        return table.to_pandas(), fingerprint
+    except Exception as e:
+        print(f"Ignoring unreadable snapshot {path}: {e}")
+        return None, None
+
+
+def write_snapshot(path, df, fingerprint):
+    """Atomically write an uncompressed Feather snapshot tagged with a fingerprint"""
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return False
+
+    table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+    table = table.replace_schema_metadata({FINGERPRINT_KEY: json.dumps(fingerprint).encode('utf-8')})
+
+    # Uncompressed so the file can be memory-mapped instead of decoded on load.
+    # Each writer gets its own temporary file, since a load refresh and a
+    # compaction can write the same snapshot at once.
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                    dir=os.path.dirname(path) or '.')
+    os.close(fd)
+    try:
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return True
@@ -0,0 +1,327 @@
+import os
+import re
+import sqlite3
+import threading
+import uuid
+import pandas as pd
+from snapshot import file_fingerprint, read_snapshot, write_snapshot
+from dedup import transaction_keys
+
+COLUMNS = ['date', 'amount', 'description', 'category', 'transaction_id']
+
+# A worksheet holds 1,048,576 rows including the header; longer histories
+# continue on sheets named "Transactions 2", "Transactions 3", ...
+EXCEL_MAX_ROWS = 1048575
+EXCEL_SHEET = 'Transactions'
+
+
+def empty_transactions():
+    """Return an empty transactions DataFrame with the expected dtypes"""
+    return pd.DataFrame({
+        'date': pd.Series(dtype='datetime64[ns]'),
+        'amount': pd.Series(dtype=float),
+        'description': pd.Series(dtype=object),
+        'category': pd.Series(dtype=object),
+        'transaction_id': pd.Series(dtype=object)
+    })
+
+
+def write_transactions_excel(df, target):
+    """Write transactions to an Excel file path or buffer, split across sheets past the row limit"""
+    with pd.ExcelWriter(target) as writer:
+        for sheet, start in enumerate(range(0, max(len(df), 1), EXCEL_MAX_ROWS), 1):
+            name = EXCEL_SHEET if sheet == 1 else f"{EXCEL_SHEET} {sheet}"
+            df.iloc[start:start + EXCEL_MAX_ROWS].to_excel(writer, sheet_name=name, index=False)
+
+
+def read_transactions_excel(path):
+    """Read an Excel export, filling in dates and transaction IDs"""
+    sheets = pd.read_excel(path, sheet_name=None)
+    # The first sheet, plus the continuation sheets of a long export
+    names = list(sheets)
+    df = pd.concat([sheets[names[0]]] + [sheets[name] for name in names[1:]
+                                         if re.fullmatch(re.escape(EXCEL_SHEET) + r' \d+', name)],
+                   ignore_index=True)
+    for column in COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    missing_ids = df['transaction_id'].isna()
+    if missing_ids.any():
+        df.loc[missing_ids, 'transaction_id'] = [str(uuid.uuid4()) for _ in range(missing_ids.sum())]
+    return df[COLUMNS]
+
+
+def snapshot_path(path):
+    return path + '.feather'
+
+
+class ExcelStore:
+    """Legacy store that rewrites the whole Excel file on every write
+
+    Loads go through a Feather snapshot that is only rebuilt when the
+    fingerprint of the Excel file changes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.snapshot_path = snapshot_path(path)
+        self._df = None
+
+    def load(self):
+        if not os.path.exists(self.path):
+            self._df = empty_transactions()
+            return self._df.copy()
+
+        fingerprint = file_fingerprint(self.path)
+        df, snapshot_fingerprint = read_snapshot(self.snapshot_path)
+        if df is None or snapshot_fingerprint != fingerprint:
+            df = read_transactions_excel(self.path)
+            write_snapshot(self.snapshot_path, df, fingerprint)
+        self._df = df
+        return self._df.copy()
+
+    def count(self):
+        if self._df is None:
+            self.load()
+        return len(self._df)
+
+    def dedup_keys(self):
+        if self._df is None:
+            self.load()
+        return transaction_keys(self._df['date'], self._df['amount'], self._df['description'])
+
+    def append(self, rows):
+        if self._df is None:
+            self.load()
+        self._df = pd.concat([self._df, rows[COLUMNS]], ignore_index=True)
+        write_transactions_excel(self._df, self.path)
+
+    def update_category(self, transaction_id, category):
+        if self._df is None:
+            self.load()
+        self._df.loc[self._df['transaction_id'] == transaction_id, 'category'] = category
+        write_transactions_excel(self._df, self.path)
+
+    def update_categories(self, updates):
+        """Set many categories at once from a {transaction_id: category} dict"""
+        if self._df is None:
+            self.load()
+        matched = self._df['transaction_id'].isin(updates)
+        self._df.loc[matched, 'category'] = self._df.loc[matched, 'transaction_id'].map(updates)
+        write_transactions_excel(self._df, self.path)
+
+    def import_excel(self, path):
+        rows = read_transactions_excel(path)
+        self.append(rows)
+        return len(rows)
+
+    def export_excel(self, target):
+        write_transactions_excel(self.load(), target)
+
+    def compact(self, background=True):
+        return None
+
+    def close(self):
+        pass
+
+
+class SQLiteStore:
+    """Append-only transaction store backed by SQLite in WAL mode
+
+    Adding rows is a single INSERT, so its cost does not grow with the size of
+    the history. Compaction (WAL checkpoint and snapshot rebuild) runs on a
+    background thread every `compact_every` appended rows.
+
+    Loads memory-map a Feather snapshot of the first `max_seq` rows and only
+    query the rows appended after it. The snapshot is discarded when the
+    store generation changes, which happens on any in-place update, or when
+    it was written for another database (see `store_id`).
+    """
+
+    def __init__(self, path, compact_every=5000, snapshot_lag=1000):
+        self.path = path
+        self.snapshot_path = snapshot_path(path)
+        self.compact_every = compact_every
+        self.snapshot_lag = snapshot_lag
+        self._rows_since_compact = 0
+        self._lock = threading.Lock()
+        self._compaction = None
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS transactions (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT,
+                amount REAL,
+                description TEXT,
+                category TEXT,
+                transaction_id TEXT UNIQUE,
+                dedup_key TEXT
+            )
+        """)
+        self._add_dedup_keys()
+        self._conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self._conn.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('generation', 0)")
+        # Random id of this database, so a snapshot left behind by a deleted or
+        # replaced database file is never mistaken for this one
+        self._conn.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('store_id', ?)",
+                           (uuid.uuid4().hex,))
+        self._conn.commit()
+
+    def _add_dedup_keys(self):
+        """Add and backfill the duplicate-detection key column on stores created before it"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(transactions)")}
+        if 'dedup_key' in columns:
+            return
+        self._conn.execute("ALTER TABLE transactions ADD COLUMN dedup_key TEXT")
+        rows = self._conn.execute("SELECT seq, date, amount, description FROM transactions").fetchall()
+        if rows:
+            seqs, dates, amounts, descriptions = zip(*rows)
+            keys = transaction_keys(dates, amounts, descriptions)
+            self._conn.executemany("UPDATE transactions SET dedup_key = ? WHERE seq = ?", zip(keys, seqs))
+        self._conn.commit()
+
+    def dedup_keys(self):
+        """Duplicate-detection keys of every stored transaction"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT dedup_key FROM transactions ORDER BY seq")]
+
+    def _fingerprint(self):
+        """Store id, current store generation and last sequence number"""
+        meta = dict(self._conn.execute("SELECT key, value FROM store_meta"))
+        max_seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM transactions").fetchone()[0]
+        return {'store_id': meta['store_id'], 'generation': meta['generation'], 'max_seq': max_seq}
+
+    def _read_rows(self, after_seq=0):
+        df = pd.read_sql_query(
+            "SELECT date, amount, description, category, transaction_id FROM transactions "
+            "WHERE seq > ? ORDER BY seq",
+            self._conn,
+            params=(after_seq,)
+        )
+        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+        return df
+
+    def load(self):
+        snapshot, snapshot_fingerprint = read_snapshot(self.snapshot_path)
+        with self._lock:
+            fingerprint = self._fingerprint()
+            if (snapshot is not None
+                    and snapshot_fingerprint.get('store_id') == fingerprint['store_id']
+                    and snapshot_fingerprint.get('generation') == fingerprint['generation']
+                    and snapshot_fingerprint.get('max_seq', 0) <= fingerprint['max_seq']):
+                tail = self._read_rows(after_seq=snapshot_fingerprint['max_seq'])
+                df = pd.concat([snapshot, tail], ignore_index=True) if not tail.empty else snapshot
+                stale_rows = len(tail)
+            else:
+                df = self._read_rows()
+                stale_rows = len(df)
+
+        if df.empty:
+            return empty_transactions()
+
+        # Refresh the snapshot off the startup path once it falls too far behind
+        if stale_rows >= self.snapshot_lag or snapshot is None:
+            threading.Thread(
+                target=write_snapshot, args=(self.snapshot_path, df.copy(), fingerprint), daemon=True
+            ).start()
+        return df
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def append(self, rows):
+        records = list(zip(
+            pd.to_datetime(rows['date'], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S').where(rows['date'].notna(), None),
+            rows['amount'].astype(float),
+            rows['description'],
+            rows['category'],
+            rows['transaction_id'],
+            transaction_keys(rows['date'], rows['amount'], rows['description'])
+        ))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO transactions (date, amount, description, category, transaction_id, dedup_key) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                records
+            )
+            self._conn.commit()
+            self._rows_since_compact += len(records)
+            should_compact = self._rows_since_compact >= self.compact_every
+        if should_compact:
+            self.compact()
+
+    def update_category(self, transaction_id, category):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE transactions SET category = ? WHERE transaction_id = ?",
+                (category, transaction_id)
+            )
+            self._conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'generation'")
+            self._conn.commit()
+
+    def update_categories(self, updates):
+        """Set many categories in one transaction from a {transaction_id: category} dict"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE transactions SET category = ? WHERE transaction_id = ?",
+                [(category, transaction_id) for transaction_id, category in updates.items()]
+            )
+            self._conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'generation'")
+            self._conn.commit()
+
+    def import_excel(self, path):
+        """Append all rows of an Excel export to the store"""
+        rows = read_transactions_excel(path)
+        if not rows.empty:
+            self.append(rows)
+        return len(rows)
+
+    def export_excel(self, target):
+        """Write the full history to an Excel file path or buffer"""
+        write_transactions_excel(self.load(), target)
+
+    def compact(self, background=True):
+        """Checkpoint the WAL into the main database file"""
+        if self._compaction is not None and self._compaction.is_alive():
+            return self._compaction
+        self._rows_since_compact = 0
+        if not background:
+            self._compact()
+            return None
+        self._compaction = threading.Thread(target=self._compact, daemon=True)
+        self._compaction.start()
+        return self._compaction
+
+    def _compact(self):
+        # A separate connection keeps compaction from blocking appends on the main one
+        try:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("PRAGMA optimize")
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Error compacting transaction store: {e}")
+            return
+
+        with self._lock:
+            fingerprint = self._fingerprint()
+            df = self._read_rows()
+        write_snapshot(self.snapshot_path, df, fingerprint)
+
+    def close(self):
+        if self._compaction is not None:
+            self._compaction.join()
+        with self._lock:
+            self._conn.close()
+
+
+def open_store(path):
+    """Open the storage backend matching the file extension"""
+    if path.endswith(('.xlsx', '.xls')):
+        return ExcelStore(path)
+    return SQLiteStore(path)